@@ -0,0 +1,54 @@
+"""
+Last-seen times of authenticated users.
+
+get_current_user records every authenticated request here. Background
+workers (such as the Gmail inbox prefetcher) use it to find the users who
+are active right now and keep their data warm. Recording is a dict write
+under a lock, cheap enough for the request path.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from app.common.metrics import metrics_registry
+
+
+class UserActivity:
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max_users
+        self._last_seen: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.signals = 0
+
+    def touch(self, user_id: int):
+        """Record that the user just made a request"""
+        with self._lock:
+            # Re-insert so the dict stays ordered from least to most recently seen
+            self._last_seen.pop(user_id, None)
+            self._last_seen[user_id] = time.time()
+            self.signals += 1
+            if len(self._last_seen) > self.max_users:
+                del self._last_seen[next(iter(self._last_seen))]
+
+    def active_users(self, within_seconds: float) -> List[int]:
+        """Users seen in the last `within_seconds`, most recent first"""
+        cutoff = time.time() - within_seconds
+        with self._lock:
+            return [user_id for user_id, seen_at in reversed(self._last_seen.items()) if seen_at >= cutoff]
+
+    def forget(self, user_id: int):
+        with self._lock:
+            self._last_seen.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tracked_users": len(self._last_seen),
+                "signals": self.signals
+            }
+
+
+# Global activity tracker instance
+user_activity = UserActivity(max_users=int(os.getenv("USER_ACTIVITY_MAX_USERS", "10000")))
+metrics_registry.register("user_activity", user_activity.stats)
@@ -10,7 +10,10 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from app.common.database import get_db
+from app.common.executor import run_blocking
 from app.common.models import User
+from app.common.user_cache import user_cache
+from app.common.activity import user_activity
 import app.common.models as models 
 
 # Configuration
@@ -31,8 +34,9 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes made with a different cost are upgraded on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -69,6 +73,19 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def authenticate_password(user: User, plain_password: str, db: Session) -> bool:
+    """
+    Verify a password on the bcrypt pool and rehash it if the stored hash
+    uses an outdated scheme or cost.
+    """
+    valid, new_hash = await run_blocking("bcrypt", pwd_context.verify_and_update, plain_password, user.hashed_password)
+    if valid and new_hash:
+        print(f"Upgrading password hash for user: {user.email}")
+        user.hashed_password = new_hash
+        db.commit()
+        user_cache.invalidate(user.email)
+    return valid
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -92,11 +109,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    
+    # Most requests resolve the user from the cache without a database round trip
+    cached_user = user_cache.get(email)
+    if cached_user is not None and user_cache.recheck_due(email):
+        # Invalidation is per process; pick up changes made through another worker
+        flags = db.query(models.User.is_active, models.User.is_admin).filter(
+            models.User.id == cached_user.id).first()
+        if flags is None or tuple(flags) != (cached_user.is_active, cached_user.is_admin):
+            user_cache.invalidate(email)
+            cached_user = None
+        else:
+            user_cache.mark_checked(email)
+    if cached_user is None:
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if user is None:
+            raise credentials_exception
+        # Keep a detached copy in the cache; the session gets a merged instance below
+        db.expunge(user)
+        user_cache.set(email, user)
+        cached_user = user
+    
+    # Activity signal for background work such as the Gmail inbox prefetcher
+    user_activity.touch(cached_user.id)
+    return db.merge(cached_user, load=False)
 
 # Routes
 @router.post("/login", response_model=Token)
@@ -104,8 +140,8 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     # Find user by email
     user = db.query(User).filter(User.email == form_data.username).first()
     
-    # Verify user exists and password is correct
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Verify user exists and password is correct (bcrypt runs off the event loop)
+    if not user or not await authenticate_password(user, form_data.password, db):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -144,7 +180,7 @@ async def admin_login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await authenticate_password(user, form_data.password, db):
         print("============ Invalid password")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -199,7 +235,7 @@ async def register_user(user: UserCreate, db = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_blocking("bcrypt", get_password_hash, user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
@@ -230,7 +266,7 @@ async def admin_create_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_blocking("bcrypt", get_password_hash, user_data.password)
     db_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -242,6 +278,7 @@ async def admin_create_user(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    user_cache.invalidate(db_user.email)
     
     return db_user
 
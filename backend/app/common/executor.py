@@ -0,0 +1,145 @@
+"""
+Shared executor for blocking I/O called from async endpoints.
+
+googleapiclient's .execute(), requests.post and bcrypt all block the calling
+thread. Running them inline in an `async def` endpoint stalls the event loop
+for every other request on the worker, so they go through run_blocking(),
+which runs them on a sized thread pool. Each upstream gets its own
+concurrency limit so a slow upstream cannot take every thread. CPU-bound
+work such as bcrypt can be given a dedicated pool so a login burst never
+competes with Gmail or Resend calls for threads.
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.common.metrics import metrics_registry
+
+
+class _UpstreamStats:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.queued = 0
+        self.max_queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "limit": self.limit,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self.total_wait_seconds / finished, 4) if finished else 0.0,
+            "avg_run_seconds": round(self.total_run_seconds / finished, 4) if finished else 0.0
+        }
+
+
+class BlockingExecutor:
+    def __init__(self, max_workers: int, upstream_limits: Dict[str, int], default_limit: int,
+                 dedicated_upstreams: Optional[List[str]] = None):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking-io")
+        self._upstream_limits = upstream_limits
+        self._default_limit = default_limit
+        # Dedicated upstreams get their own pool sized to their concurrency limit
+        self._dedicated_executors = {
+            upstream: ThreadPoolExecutor(max_workers=self._limit_for(upstream), thread_name_prefix=f"{upstream}-pool")
+            for upstream in dedicated_upstreams or []
+        }
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _UpstreamStats] = {}
+        self._lock = threading.Lock()
+
+    def _limit_for(self, upstream: str) -> int:
+        return self._upstream_limits.get(upstream, self._default_limit)
+
+    def _stats_for(self, upstream: str) -> _UpstreamStats:
+        with self._lock:
+            stats = self._stats.get(upstream)
+            if stats is None:
+                stats = self._stats[upstream] = _UpstreamStats(self._limit_for(upstream))
+            return stats
+
+    def _semaphore_for(self, upstream: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(upstream)
+        if semaphore is None:
+            semaphore = self._semaphores[upstream] = asyncio.Semaphore(self._limit_for(upstream))
+        return semaphore
+
+    async def run(self, upstream: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool under the upstream's concurrency limit"""
+        stats = self._stats_for(upstream)
+        queued_at = time.perf_counter()
+        with self._lock:
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+
+        try:
+            await self._semaphore_for(upstream).acquire()
+        except BaseException:
+            with self._lock:
+                stats.queued -= 1
+            raise
+
+        started_at = time.perf_counter()
+        with self._lock:
+            stats.queued -= 1
+            stats.active += 1
+            stats.total_wait_seconds += started_at - queued_at
+
+        failed = False
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._dedicated_executors.get(upstream, self._executor)
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._semaphore_for(upstream).release()
+            with self._lock:
+                stats.active -= 1
+                stats.total_run_seconds += time.perf_counter() - started_at
+                if failed:
+                    stats.failed += 1
+                else:
+                    stats.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "dedicated_pools": {name: self._limit_for(name) for name in self._dedicated_executors},
+                "upstreams": {name: stats.as_dict() for name, stats in self._stats.items()}
+            }
+
+
+# Global executor instance
+blocking_executor = BlockingExecutor(
+    max_workers=int(os.getenv("BLOCKING_IO_THREADS", "32")),
+    upstream_limits={
+        "gmail": int(os.getenv("BLOCKING_IO_GMAIL_LIMIT", "16")),
+        "resend": int(os.getenv("BLOCKING_IO_RESEND_LIMIT", "8")),
+        "bcrypt": int(os.getenv("BLOCKING_IO_BCRYPT_LIMIT", "4"))
+    },
+    default_limit=int(os.getenv("BLOCKING_IO_DEFAULT_LIMIT", "8")),
+    # bcrypt releases the GIL while hashing, so a thread pool gives real parallelism
+    dedicated_upstreams=["bcrypt"]
+)
+metrics_registry.register("blocking_executor", blocking_executor.stats)
+
+
+async def run_blocking(upstream: str, func: Callable, *args, **kwargs) -> Any:
+    """Run blocking work for an upstream ("gmail", "resend", "bcrypt", ...) off the event loop"""
+    return await blocking_executor.run(upstream, func, *args, **kwargs)
@@ -0,0 +1,36 @@
+"""
+Lightweight in-process metrics.
+
+Caches, pools and clients register a callable that returns a dict of their
+current counters; the admin metrics endpoint collects them into one snapshot.
+"""
+import threading
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        """Register (or replace) the stats provider for a component"""
+        with self._lock:
+            self._providers[name] = provider
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Collect the current stats of every registered component"""
+        with self._lock:
+            providers = dict(self._providers)
+
+        snapshot = {}
+        for name, provider in providers.items():
+            try:
+                snapshot[name] = provider()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        return snapshot
+
+
+# Global registry instance
+metrics_registry = MetricsRegistry()
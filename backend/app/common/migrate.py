@@ -0,0 +1,42 @@
+"""
+Apply Alembic migrations at startup.
+
+The schema is owned by the migrations in backend/migrations; this replaces
+the old Base.metadata.create_all() call so new and existing databases end up
+on the same revision. On Postgres an advisory lock keeps several workers
+from migrating at the same time.
+"""
+import os
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from app.common.database import engine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent.parent / "alembic.ini"
+
+# Arbitrary constant shared by every worker
+MIGRATION_LOCK_ID = 7410231
+
+
+def upgrade_database(revision: str = "head"):
+    """Upgrade the database to the given revision"""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    config.attributes["configure_logger"] = False
+
+    with engine.connect() as connection:
+        is_postgres = connection.dialect.name == "postgresql"
+        if is_postgres:
+            connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
+            connection.commit()
+        finally:
+            if is_postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+                connection.commit()
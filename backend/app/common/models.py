@@ -1,8 +1,9 @@
 # Make sure models.py doesn't import from auth.py
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
+from app.common.utils import normalize_name
 
 Base = declarative_base()
 
@@ -35,9 +36,18 @@ class EmailHistory(Base):
     email_id = Column(String)
     status = Column(String, default="sent")
     created_at = Column(DateTime, default=datetime.utcnow)
+    # When a queued email was claimed for sending (status "sending")
+    claimed_at = Column(DateTime)
     
     # Relationships
     user = relationship("User", back_populates="email_histories")
+    
+    # Back keyset pagination on (created_at, id), per user and across users
+    __table_args__ = (
+        Index("ix_email_histories_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_email_histories_created_at_id", "created_at", "id"),
+        Index("ix_email_histories_status_created_at", "status", "created_at"),
+    )
 
 class EmailNameMap(Base):
     __tablename__ = "email_name_maps"
@@ -45,10 +55,20 @@ class EmailNameMap(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     name = Column(String)
+    name_key = Column(String)  # Normalized name used for lookups, set from name
     email_address = Column(String)
     
     # Relationships
     user = relationship("User", back_populates="email_name_maps")
+    
+    __table_args__ = (
+        Index("ix_email_name_maps_user_id_name_key", "user_id", "name_key", unique=True),
+    )
+    
+    @validates("name")
+    def _set_name_key(self, key, name):
+        self.name_key = normalize_name(name)
+        return name
 
 class OAuthToken(Base):
     __tablename__ = "oauth_tokens"
@@ -57,7 +77,54 @@ class OAuthToken(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     service = Column(String, nullable=False)  # 'gmail', 'outlook', etc.
     token_data = Column(JSON, nullable=False)  # Store token as JSON
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every write, for optimistic updates
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    user = relationship("User", back_populates="oauth_tokens")
+    
+    __table_args__ = (
+        Index("ix_oauth_tokens_user_id_service", "user_id", "service", unique=True),
+    )
+
+class GmailMessage(Base):
+    """Local copy of a fetched Gmail message, so views do not re-download it"""
+    __tablename__ = "gmail_messages"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    message_id = Column(String, nullable=False)
+    thread_id = Column(String)
+    subject = Column(String)
+    from_address = Column(String)
+    date = Column(String)  # Date header as sent
+    snippet = Column(String)
+    body = Column(Text)  # Extracted body; NULL once evicted
+    body_size = Column(Integer, default=0)
+    label_ids = Column(JSON)
+    internal_date = Column(BigInteger)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_gmail_messages_user_id_message_id", "user_id", "message_id", unique=True),
+        Index("ix_gmail_messages_user_id_last_accessed_at", "user_id", "last_accessed_at"),
+    )
+
+class GmailWatch(Base):
+    """Active Gmail push (users.watch) registration, mapping a mailbox to its user"""
+    __tablename__ = "gmail_watches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    email_address = Column(String, nullable=False)
+    topic_name = Column(String, nullable=False)
+    history_id = Column(String)  # historyId returned when the watch was registered
+    expiration = Column(DateTime, nullable=False)  # Gmail stops notifying after this
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    user = relationship("User", back_populates="oauth_tokens")
\ No newline at end of file
+    __table_args__ = (
+        Index("ix_gmail_watches_user_id", "user_id", unique=True),
+        Index("ix_gmail_watches_email_address", "email_address"),
+    )
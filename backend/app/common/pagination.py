@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination for the email history endpoints.
+
+Pages are ordered newest first on (created_at, id) and the cursor is the
+position of the last row served, so fetching any page is an index range
+scan no matter how deep it is, unlike OFFSET. The next cursor is returned
+in the X-Next-Cursor response header so list responses keep their shape.
+"""
+import base64
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.common.models import EmailHistory
+
+DEFAULT_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def filter_email_history(query: Query, recipient: Optional[str] = None, status: Optional[str] = None,
+                         date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Query:
+    """Apply the optional history filters shared by the user and admin endpoints"""
+    if recipient:
+        query = query.filter(EmailHistory.recipient.ilike(f"%{recipient}%"))
+    if status:
+        query = query.filter(EmailHistory.status == status)
+    if date_from:
+        query = query.filter(EmailHistory.created_at >= date_from)
+    if date_to:
+        query = query.filter(EmailHistory.created_at < date_to)
+    return query
+
+
+def paginate_email_history(query: Query, cursor: Optional[str], limit: Optional[int]) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return one page of the query, newest first, and the cursor for the next
+    page (None on the last page). Works for queries that select EmailHistory
+    rows or rows with created_at and id columns.
+    """
+    page_size = clamp_page_size(limit)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(EmailHistory.created_at, EmailHistory.id) < tuple_(created_at, row_id))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(EmailHistory.created_at.desc(), EmailHistory.id.desc()).limit(page_size + 1).all()
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -35,6 +35,7 @@ class EmailHistoryResponse(BaseModel):
     email_id: Optional[str]
     status: str
     created_at: datetime
+    user_email: Optional[str] = None  # Only set by the admin listings
     
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Short-lived cache of authenticated users keyed by the JWT subject (email).
+
+get_current_user runs on every authenticated request, and the chat UI sends
+several per interaction. Caching the user row for a few seconds lets most of
+those requests resolve identity without a database round trip. Admin
+create/deactivate invalidate the entry so account changes apply at once.
+
+The cache and its invalidation are per process, so a deactivation handled
+by another worker is not seen here until get_current_user re-checks the
+account flags, which it does once an entry is recheck_interval seconds old.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+from app.common.metrics import metrics_registry
+from app.common.models import User
+
+
+class UserCache:
+    def __init__(self, maxsize: int = 1024, ttl: int = 60, recheck_interval: int = 10):
+        self.ttl = ttl
+        self.recheck_interval = recheck_interval
+        # email -> [detached User, time its flags were last checked]
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.rechecks = 0
+
+    def get(self, email: str) -> Optional[User]:
+        """Return the cached detached User, or None on a miss"""
+        with self._lock:
+            entry = self._cache.get(email)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def set(self, email: str, user: User):
+        """Cache a User that has been expunged from its session"""
+        with self._lock:
+            self._cache[email] = [user, time.time()]
+
+    def recheck_due(self, email: str) -> bool:
+        """True when the cached user's account flags should be compared with the database"""
+        with self._lock:
+            entry = self._cache.get(email)
+            return entry is not None and time.time() - entry[1] >= self.recheck_interval
+
+    def mark_checked(self, email: str):
+        with self._lock:
+            entry = self._cache.get(email)
+            if entry is not None:
+                # Updated in place so the entry keeps its original TTL
+                entry[1] = time.time()
+            self.rechecks += 1
+
+    def invalidate(self, email: str):
+        with self._lock:
+            if self._cache.pop(email, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "rechecks": self.rechecks
+            }
+
+
+# Global user cache instance
+user_cache = UserCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("USER_CACHE_TTL", "60")),
+    recheck_interval=int(os.getenv("USER_CACHE_RECHECK_INTERVAL", "10"))
+)
+metrics_registry.register("user_cache", user_cache.stats)
@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a contact name for matching: strip accents, collapse whitespace
+    and casefold, so "  José  Díaz" and "jose diaz" share one key.
+    """
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _WHITESPACE_RE.sub(" ", stripped).strip().casefold()
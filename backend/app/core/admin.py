@@ -6,6 +6,9 @@ from app.common.database import get_db
 from app.common.models import User
 from app.common.auth import get_current_user
 from app.common.schemas import UserCreate, UserResponse
+from app.common.metrics import metrics_registry
+from app.common.executor import run_blocking
+from app.common.user_cache import user_cache
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -40,7 +43,7 @@ async def create_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_blocking("bcrypt", get_password_hash, user_data.password)
     db_user = User(
         email=user_data.email,
         name=getattr(user_data, 'name', None),
@@ -53,6 +56,7 @@ async def create_user(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    user_cache.invalidate(db_user.email)
     
     return db_user
 
@@ -81,5 +85,13 @@ async def deactivate_user(
     user.is_active = False
     db.commit()
     db.refresh(user)
+    user_cache.invalidate(user.email)
     
-    return user
\ No newline at end of file
+    return user
+
+@router.get("/metrics")
+async def get_metrics(
+    admin: User = Depends(require_admin)
+):
+    """Cache, pool and client counters for this worker process"""
+    return metrics_registry.snapshot()
@@ -0,0 +1,162 @@
+# backend/app/core/completion_cache.py
+"""
+Cache for OpenAI completions that are safe to reuse, such as generated email
+bodies for a request the user retries or regenerates.
+
+Entries are keyed on the model, the whitespace-normalized prompt messages and the
+sampling parameters. Lookups go to an in-process LRU first and then to an
+optional disk tier (enabled by COMPLETION_CACHE_DIR) that survives restarts
+and is shared by every worker on the machine.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+from app.common.metrics import metrics_registry
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Request fields that change the completion and therefore belong in the key
+_SAMPLING_PARAMS = ("temperature", "top_p", "max_tokens", "presence_penalty", "frequency_penalty", "seed")
+
+
+def _normalize_text(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+class CompletionCache:
+    def __init__(self, maxsize: int = 512, ttl: int = 86400, disk_dir: Optional[str] = None,
+                 disk_max_entries: int = 5000, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = disk_max_entries
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def make_key(self, request: Dict[str, Any]) -> str:
+        """Build the cache key for a chat completion request"""
+        key_data = {
+            "model": request.get("model"),
+            "messages": [
+                {"role": message["role"], "content": _normalize_text(message.get("content"))}
+                for message in request.get("messages", [])
+            ],
+            "params": {name: request.get(name) for name in _SAMPLING_PARAMS if name in request}
+        }
+        encoded = json.dumps(key_data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion text, or None on a miss"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.tokens_saved += entry["tokens"]
+                return entry["content"]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            # Promote to the memory tier
+            self._memory[key] = entry
+            self.hits += 1
+            self.disk_hits += 1
+            self.tokens_saved += entry["tokens"]
+        return entry["content"]
+
+    def set(self, key: str, content: str, tokens: int = 0):
+        """Store a completion along with the tokens it cost to produce"""
+        entry = {"content": content, "tokens": tokens, "created_at": time.time()}
+        with self._lock:
+            self._memory[key] = entry
+        self._write_disk(key, entry)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        if not self.disk_dir:
+            return
+        try:
+            # Write to a temp file first so readers never see a partial entry
+            tmp_path = self.disk_dir / f"{key}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._disk_path(key))
+            self._evict_disk()
+        except OSError as e:
+            print(f"Error writing completion cache entry: {e}")
+
+    def _evict_disk(self):
+        """Drop the oldest disk entries once the tier grows past its size bound"""
+        entries = list(self.disk_dir.glob("*.json"))
+        overflow = len(entries) - self.disk_max_entries
+        if overflow <= 0:
+            return
+        entries.sort(key=lambda path: path.stat().st_mtime)
+        for path in entries[:overflow]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "memory_size": len(self._memory),
+                "disk_enabled": self.disk_dir is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "tokens_saved": self.tokens_saved
+            }
+
+
+# Global completion cache instance
+completion_cache = CompletionCache(
+    maxsize=int(os.getenv("COMPLETION_CACHE_SIZE", "512")),
+    ttl=int(os.getenv("COMPLETION_CACHE_TTL", "86400")),
+    disk_dir=os.getenv("COMPLETION_CACHE_DIR"),
+    disk_max_entries=int(os.getenv("COMPLETION_CACHE_DISK_MAX_ENTRIES", "5000")),
+    enabled=os.getenv("COMPLETION_CACHE_ENABLED", "true").lower() == "true"
+)
+metrics_registry.register("completion_cache", completion_cache.stats)
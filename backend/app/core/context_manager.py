@@ -0,0 +1,211 @@
+# backend/app/core/context_manager.py
+"""
+Keeps the chat history sent to OpenAI inside a token budget.
+
+The frontend sends the whole conversation on every turn. Before it is
+forwarded, bulky messages (pasted email bodies, inbox dumps) are trimmed,
+the most recent turns are kept verbatim and anything older than the budget
+allows is folded into a short extractive summary. The turn that asked for
+the email is never summarized away, since the email tools draft from it.
+"""
+import hashlib
+import os
+import re
+import threading
+from typing import Any, Dict, List, Set, Tuple
+
+from app.common.metrics import metrics_registry
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Per-message overhead the chat format adds on top of the content tokens
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+_ENCODING_NAME = "o200k_base"
+_ENCODING_URL = "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken"
+_ENCODING_SHA256 = "446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d"
+
+# Bundled copy of the encoding, filled at build time by `python -m app.core.context_manager`
+BUNDLED_ENCODING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiktoken_cache")
+
+
+def _encoding_path(cache_dir: str) -> str:
+    # tiktoken names cached files after the SHA-1 of their download URL
+    return os.path.join(cache_dir, hashlib.sha1(_ENCODING_URL.encode()).hexdigest())
+
+
+def _load_encoder(cache_dir: str):
+    """
+    tiktoken's encoder read from the local copy of the encoding in
+    `cache_dir`, or None when there is no valid copy. Never downloads:
+    tiktoken only goes to the network when its cached file is missing or
+    corrupt, and both cases are caught here first.
+    """
+    try:
+        with open(_encoding_path(cache_dir), "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != _ENCODING_SHA256:
+                print(f"Ignoring corrupt tiktoken encoding in {cache_dir}")
+                return None
+        import tiktoken
+        os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir
+        return tiktoken.get_encoding(_ENCODING_NAME)
+    except Exception:
+        return None
+
+
+def download_encoding(cache_dir: str = BUNDLED_ENCODING_DIR):
+    """Fetch the encoding into `cache_dir` (run at build time, never while serving)"""
+    import tiktoken
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir
+    tiktoken.get_encoding(_ENCODING_NAME)
+    print(f"Stored the {_ENCODING_NAME} encoding in {cache_dir}")
+
+
+class ConversationContextManager:
+    def __init__(self, max_prompt_tokens: int = 3000, recent_messages: int = 8,
+                 max_message_chars: int = 2000, summary_chars: int = 600,
+                 encoding_dir: str = None):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.recent_messages = recent_messages
+        self.max_message_chars = max_message_chars
+        self.summary_chars = summary_chars
+        self.encoding_dir = encoding_dir or os.getenv("TIKTOKEN_CACHE_DIR") or BUNDLED_ENCODING_DIR
+
+        # Loaded on the first count, so importing this module never touches the disk or network
+        self._encoder = None
+        self._encoder_loaded = False
+        self._encoder_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.compacted_requests = 0
+        self.original_tokens = 0
+        self.sent_tokens = 0
+        self.last_request = {}
+
+    def _get_encoder(self):
+        if not self._encoder_loaded:
+            with self._encoder_lock:
+                if not self._encoder_loaded:
+                    self._encoder = _load_encoder(self.encoding_dir)
+                    self._encoder_loaded = True
+                    if self._encoder is None:
+                        print(f"No {_ENCODING_NAME} encoding in {self.encoding_dir}; approximating token counts")
+        return self._encoder
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        encoder = self._get_encoder()
+        if encoder is not None:
+            return len(encoder.encode(text))
+        # Offline approximation: roughly four characters per token for English text
+        return (len(text) + 3) // 4
+
+    def count_message_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(self.count_tokens(message.get("content") or "") + _MESSAGE_OVERHEAD_TOKENS
+                   for message in messages)
+
+    def _strip_bulky(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Trim a long message (usually a pasted email) down to its opening"""
+        content = message.get("content") or ""
+        if len(content) <= self.max_message_chars:
+            return message
+        omitted = len(content) - self.max_message_chars
+        return dict(message, content=f"{content[:self.max_message_chars]}\n[... {omitted} characters omitted ...]")
+
+    def _summarize(self, messages: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Fold dropped turns into one short extractive summary message"""
+        lines = []
+        per_message = max(40, self.summary_chars // max(len(messages), 1))
+        for message in messages:
+            text = _WHITESPACE_RE.sub(" ", message.get("content") or "").strip()
+            if len(text) > per_message:
+                text = text[:per_message].rstrip() + "..."
+            lines.append(f"- {message['role']}: {text}")
+        summary = "\n".join(lines)[:self.summary_chars]
+        return {"role": "system", "content": f"Summary of earlier conversation:\n{summary}"}
+
+    def _composition_turns(self, messages: List[Dict[str, Any]]) -> Set[int]:
+        """
+        Indexes of the user turns the email tools read the composition request
+        from (the first user message and the first one asking for an email to
+        someone), so a contact lookup several turns later can still draft it.
+        """
+        user_turns = [index for index, message in enumerate(messages) if message["role"] == "user"]
+        requests = [index for index in user_turns if "email to" in (messages[index].get("content") or "").lower()]
+        return set(user_turns[:1] + requests[:1])
+
+    def compact(self, messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Return the messages to send and the prompt size before and after.
+        The latest message is always kept in full, and the turns holding the
+        composition request are kept (trimmed) ahead of the recent window.
+        """
+        original_tokens = self.count_message_tokens(messages)
+        composition_turns = self._composition_turns(messages[:-1])
+
+        if messages:
+            kept = [self._strip_bulky(message) for message in messages[:-1]] + [messages[-1]]
+        else:
+            kept = []
+        kept = list(enumerate(kept))
+
+        # Sliding window over the most recent turns, then shrink it to the budget
+        dropped = kept[:-self.recent_messages] if len(kept) > self.recent_messages else []
+        kept = kept[len(dropped):]
+        pinned = [message for index, message in dropped if index in composition_turns]
+        while len(kept) > 1 and self.count_message_tokens(pinned + [message for _, message in kept]) > self.max_prompt_tokens:
+            index, message = kept.pop(0)
+            dropped.append((index, message))
+            if index in composition_turns:
+                pinned.append(message)
+
+        dropped = [message for index, message in dropped if index not in composition_turns]
+        kept = pinned + [message for _, message in kept]
+        compacted = ([self._summarize(dropped)] if dropped else []) + kept
+        sent_tokens = self.count_message_tokens(compacted)
+
+        stats = {
+            "original_messages": len(messages),
+            "sent_messages": len(compacted),
+            "original_tokens": original_tokens,
+            "sent_tokens": sent_tokens
+        }
+        with self._lock:
+            self.requests += 1
+            if sent_tokens < original_tokens:
+                self.compacted_requests += 1
+            self.original_tokens += original_tokens
+            self.sent_tokens += sent_tokens
+            self.last_request = stats
+        return compacted, stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tokenizer": ("not loaded" if not self._encoder_loaded
+                              else "tiktoken" if self._encoder is not None else "approximate"),
+                "max_prompt_tokens": self.max_prompt_tokens,
+                "requests": self.requests,
+                "compacted_requests": self.compacted_requests,
+                "original_tokens": self.original_tokens,
+                "sent_tokens": self.sent_tokens,
+                "tokens_saved": self.original_tokens - self.sent_tokens,
+                "last_request": dict(self.last_request)
+            }
+
+
+# Global context manager instance
+context_manager = ConversationContextManager(
+    max_prompt_tokens=int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "3000")),
+    recent_messages=int(os.getenv("CHAT_CONTEXT_RECENT_MESSAGES", "8")),
+    max_message_chars=int(os.getenv("CHAT_CONTEXT_MAX_MESSAGE_CHARS", "2000"))
+)
+metrics_registry.register("chat_context", context_manager.stats)
+
+
+if __name__ == "__main__":
+    download_encoding()
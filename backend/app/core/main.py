@@ -13,7 +13,7 @@ from fastapi.middleware.cors import CORSMiddleware
 # Import routers - UPDATED PATHS
 from app.common.auth import router as auth_router
 from app.common import models
-from app.common.database import engine
+from app.common.migrate import upgrade_database
 from app.core.admin import router as admin_router
 from app.tools.read_gmail_tool.oauth_callback import router as gmail_oauth_callback_router
 from app.tools.send_email_tool.oauth_callback import router as email_tools_oauth_callback_router
@@ -28,10 +28,14 @@ from app.tools.reply_gmail_tool.router import router as reply_gmail_router
 
 # Import read_gmail_router - temporarily removed error handling to see actual error
 from app.tools.read_gmail_tool.router import router as read_gmail_router
+from app.tools.read_gmail_tool.prefetcher import inbox_prefetcher
+from app.tools.read_gmail_tool.push import gmail_push
+from app.tools.send_email_tool.outbox import email_outbox
 READ_GMAIL_AVAILABLE = True
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Bring the database schema up to date (set RUN_MIGRATIONS=false to manage it with `alembic upgrade head`)
+if os.getenv("RUN_MIGRATIONS", "true").lower() == "true":
+    upgrade_database()
 
 print(f"OpenAI API Key: {os.getenv('OPENAI_API_KEY') is not None}")
 print(f"Resend API Key: {os.getenv('RESEND_API_KEY') is not None}")
@@ -48,8 +52,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Background workers run on the app's event loop
+@app.on_event("startup")
+async def start_background_workers():
+    if gmail_push.enabled:
+        gmail_push.load_watches()
+    inbox_prefetcher.start()
+    email_outbox.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await inbox_prefetcher.stop()
+    await email_outbox.stop()
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(admin_router)
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from app.common.database import get_db
 from app.common.auth import get_current_user
 from app.common.models import User, EmailNameMap
+from app.common.utils import normalize_name
+from app.tools.lookup_contact_tool.contact_index import contact_index
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -10,7 +12,7 @@ router = APIRouter()
 def add_name_email_mapping(name: str, email_address: str, user_id: int, db: Session):
     existing = db.query(EmailNameMap).filter(
         EmailNameMap.user_id == user_id,
-        EmailNameMap.name.ilike(name)
+        EmailNameMap.name_key == normalize_name(name)
     ).first()
     
     if existing:
@@ -24,6 +26,7 @@ def add_name_email_mapping(name: str, email_address: str, user_id: int, db: Sess
         db.add(new_mapping)
     
     db.commit()
+    contact_index.add_mapping(user_id, name, email_address)
 
 class NameEmailMapping(BaseModel):
     name: str
@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.common.database import get_db
+from app.common.database import get_db, SessionLocal
+from app.common.executor import run_blocking
 from app.common.auth import get_current_user
 from app.common.models import User, EmailHistory
+from app.common.pagination import filter_email_history, paginate_email_history, set_next_cursor
 from app.core.ai_client import ai_client
+from app.core.context_manager import context_manager
 from app.tools.send_email_tool.email_client import email_client
 from app.common.schemas import EmailHistoryResponse
 from app.tools.read_gmail_tool.schemas import GmailEmail
-from app.tools.read_gmail_tool.read_functions import read_gmail_inbox
+from app.tools.read_gmail_tool.read_functions import read_gmail_inbox, read_cached_gmail_inbox
+from app.tools.read_gmail_tool.prefetcher import inbox_prefetcher
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+from datetime import datetime
+import json
 
 
 class ArchiveRequest(BaseModel):
@@ -26,6 +34,8 @@ class ChatMessage(BaseModel):
 class EmailToolsRequest(BaseModel):
     messages: List[ChatMessage]
     tool_type: str = "email"
+    # Write email drafts fresh instead of reusing a cached one ("try again")
+    regenerate: bool = False
 
 class EmailCompositionResponse(BaseModel):
     recipient: str
@@ -40,6 +50,117 @@ class EmailToolsResponse(BaseModel):
     has_tool_calls: bool = False
     email_composition: Optional[EmailCompositionResponse] = None
     gmail_emails: Optional[List[GmailEmail]] = None
+    # Age of the inbox shown in gmail_emails (0 when synced during the request)
+    cache_age_seconds: Optional[float] = None
+
+GMAIL_CHAT_INBOX_SIZE = 10
+
+GMAIL_READ_PHRASES = [
+    "read my inbox", "check my email", "read my email", 
+    "check inbox", "show my emails", "read gmail", "view my inbox",
+    "open my inbox", "get my emails", "fetch my emails"
+]
+
+def _should_read_gmail(request: EmailToolsRequest) -> bool:
+    """Check if user is explicitly asking to read Gmail while in email tools mode"""
+    user_message = request.messages[-1].text if request.messages and request.messages else ""
+    should_read_gmail = any(phrase in user_message.lower() for phrase in GMAIL_READ_PHRASES)
+    return should_read_gmail and request.tool_type == 'email'
+
+def _inbox_chat_response(gmail_result: Dict[str, Any]) -> EmailToolsResponse:
+    return EmailToolsResponse(
+        success=True,
+        message=f"I found {gmail_result['count']} emails in your inbox. Here are your recent emails:",
+        tool_results=[],
+        has_tool_calls=False,
+        gmail_emails=gmail_result["emails"],
+        cache_age_seconds=gmail_result.get("cache_age_seconds")
+    )
+
+def _gmail_inbox_response(user_id: int, db: Session) -> EmailToolsResponse:
+    """Read the inbox directly (no LLM round trip) and wrap it as a chat response"""
+    try:
+        gmail_result = read_gmail_inbox(user_id, GMAIL_CHAT_INBOX_SIZE, db)
+        
+        if gmail_result["success"]:
+            return _inbox_chat_response(gmail_result)
+        else:
+            return EmailToolsResponse(
+                success=False,
+                message=gmail_result["message"],
+                tool_results=[],
+                has_tool_calls=False,
+                gmail_emails=None
+            )
+    except HTTPException as e:
+        # Handle OAuth authentication required
+        if e.status_code == 401 and isinstance(e.detail, dict) and "auth_url" in e.detail:
+            return EmailToolsResponse(
+                success=False,
+                message="Gmail authentication required. Click the button below to authorize access to your Gmail account.",
+                tool_results=[{
+                    "type": "oauth_required",
+                    "service": "gmail",
+                    "auth_url": e.detail['auth_url'],
+                    "button_text": "Authorize Gmail Access"
+                }],
+                has_tool_calls=True,
+                gmail_emails=None
+            )
+        else:
+            return EmailToolsResponse(
+                success=False,
+                message=str(e.detail),
+                tool_results=[],
+                has_tool_calls=False,
+                gmail_emails=None
+            )
+
+async def _gmail_inbox_chat_response(user_id: int, db: Session) -> EmailToolsResponse:
+    """
+    Stale-while-revalidate: answer from the synced inbox when it is recent
+    enough and refresh it in the background, otherwise sync in the request.
+    """
+    cached_result = read_cached_gmail_inbox(user_id, GMAIL_CHAT_INBOX_SIZE)
+    if cached_result is not None:
+        inbox_prefetcher.revalidate(user_id)
+        return _inbox_chat_response(cached_result)
+    return await run_blocking("gmail", _gmail_inbox_response, user_id, db)
+
+def _to_openai_messages(request: EmailToolsRequest) -> List[Dict[str, str]]:
+    """Convert messages to OpenAI format, compacted to the context budget"""
+    openai_messages = []
+    
+    for msg in request.messages:
+        role = "user" if msg.isUser else "assistant"
+        openai_messages.append({
+            "role": role,
+            "content": msg.text
+        })
+    
+    compacted_messages, context_stats = context_manager.compact(openai_messages)
+    print(f"Chat context: {context_stats['original_messages']} messages / ~{context_stats['original_tokens']} tokens "
+          f"-> {context_stats['sent_messages']} messages / ~{context_stats['sent_tokens']} tokens")
+    return compacted_messages
+
+def _store_sent_email_history(result: Dict[str, Any], user_id: int, db: Session):
+    """Store email history only if email was actually sent (has details)"""
+    if result.get("tool_results"):
+        for tool_result in result["tool_results"]:
+            if (tool_result["tool_name"] == "send_email" and 
+                tool_result["result"]["success"] and 
+                "details" in tool_result["result"]):
+                # Create email history record
+                email_history = EmailHistory(
+                    user_id=user_id,
+                    recipient=tool_result["result"]["details"]["recipient"],
+                    subject=tool_result["result"]["details"]["subject"],
+                    content_preview=tool_result["result"]["details"]["content_preview"],
+                    email_id=tool_result["result"]["details"].get("email_id"),
+                    status="sent"
+                )
+                db.add(email_history)
+                db.commit()
 
 @router.post("/chat", response_model=EmailToolsResponse)
 async def email_tools_chat(
@@ -53,78 +174,22 @@ async def email_tools_chat(
     try:
         print(f"Email tools chat request received: {request}")
         
-        # Check if user is explicitly asking to read Gmail
-        user_message = request.messages[-1].text if request.messages and request.messages else ""
-        should_read_gmail = any(phrase in user_message.lower() for phrase in [
-            "read my inbox", "check my email", "read my email", 
-            "check inbox", "show my emails", "read gmail", "view my inbox",
-            "open my inbox", "get my emails", "fetch my emails"
-        ])
-        
         # If user explicitly asks to read Gmail and we're in email tools mode, call tool directly
-        if should_read_gmail and request.tool_type == 'email':
+        if _should_read_gmail(request):
             print("User requested Gmail reading, calling tool directly")
-            try:
-                gmail_result = read_gmail_inbox(current_user.id, 10, db)
-                
-                if gmail_result["success"]:
-                    return EmailToolsResponse(
-                        success=True,
-                        message=f"I found {gmail_result['count']} emails in your inbox. Here are your recent emails:",
-                        tool_results=[],
-                        has_tool_calls=False,
-                        gmail_emails=gmail_result["emails"]
-                    )
-                else:
-                    return EmailToolsResponse(
-                        success=False,
-                        message=gmail_result["message"],
-                        tool_results=[],
-                        has_tool_calls=False,
-                        gmail_emails=None
-                    )
-            except HTTPException as e:
-                # Handle OAuth authentication required
-                if e.status_code == 401 and isinstance(e.detail, dict) and "auth_url" in e.detail:
-                    return EmailToolsResponse(
-                        success=False,
-                        message="Gmail authentication required. Click the button below to authorize access to your Gmail account.",
-                        tool_results=[{
-                            "type": "oauth_required",
-                            "service": "gmail",
-                            "auth_url": e.detail['auth_url'],
-                            "button_text": "Authorize Gmail Access"
-                        }],
-                        has_tool_calls=True,
-                        gmail_emails=None
-                    )
-                else:
-                    return EmailToolsResponse(
-                        success=False,
-                        message=str(e.detail),
-                        tool_results=[],
-                        has_tool_calls=False,
-                        gmail_emails=None
-                    )
+            return await _gmail_inbox_chat_response(current_user.id, db)
         
-        # Convert messages to OpenAI format
-        openai_messages = []
-        
-        for msg in request.messages:
-            role = "user" if msg.isUser else "assistant"
-            openai_messages.append({
-                "role": role,
-                "content": msg.text
-            })
+        openai_messages = _to_openai_messages(request)
         
         print(f"Sending to AI client: {openai_messages}")
         
         # Process with AI client (pass user_id and db)
-        result = ai_client.chat_with_tools(
+        result = await ai_client.chat_with_tools_async(
             openai_messages, 
             request.tool_type,
             user_id=current_user.id,
-            db=db
+            db=db,
+            regenerate=request.regenerate
         )
         print(f"AI client result: {result}")
         
@@ -147,23 +212,7 @@ async def email_tools_chat(
                             ))
                     break
         
-        # Store email history only if email was actually sent (has details)
-        if result.get("tool_results"):
-            for tool_result in result["tool_results"]:
-                if (tool_result["tool_name"] == "send_email" and 
-                    tool_result["result"]["success"] and 
-                    "details" in tool_result["result"]):
-                    # Create email history record
-                    email_history = EmailHistory(
-                        user_id=current_user.id,
-                        recipient=tool_result["result"]["details"]["recipient"],
-                        subject=tool_result["result"]["details"]["subject"],
-                        content_preview=tool_result["result"]["details"]["content_preview"],
-                        email_id=tool_result["result"]["details"].get("email_id"),
-                        status="sent"
-                    )
-                    db.add(email_history)
-                    db.commit()
+        _store_sent_email_history(result, current_user.id, db)
         
         # Return the response including gmail_emails if available
         response_data = {
@@ -194,29 +243,114 @@ async def email_tools_chat(
             gmail_emails=None
         )
 
+def _sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@router.post("/chat/stream")
+async def email_tools_chat_stream(
+    request: EmailToolsRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streaming version of /chat using Server-Sent Events.
+    
+    Emits "token" events as the model writes, "tool_call" and
+    "email_composition" events as they happen, and a final "done" event
+    with the same fields as the /chat response.
+    """
+    user_id = current_user.id
+
+    async def event_stream():
+        # The request-scoped session is closed before a streaming body runs,
+        # so the stream owns its session
+        db = SessionLocal()
+        try:
+            if _should_read_gmail(request):
+                response = await _gmail_inbox_chat_response(user_id, db)
+                yield _sse_event("done", response.model_dump())
+                return
+            
+            async for event in ai_client.stream_chat_with_tools(
+                _to_openai_messages(request),
+                request.tool_type,
+                user_id=user_id,
+                db=db,
+                regenerate=request.regenerate
+            ):
+                if event["event"] != "done":
+                    yield _sse_event(event["event"], event["data"])
+                    continue
+                
+                result = event["data"]
+                _store_sent_email_history(result, user_id, db)
+                yield _sse_event("done", {
+                    "success": result.get("success", False),
+                    "message": result.get("message", ""),
+                    "tool_results": [],  # Hide technical details, as /chat does
+                    "has_tool_calls": result.get("has_tool_calls", False),
+                    "email_composition": result.get("email_composition")
+                })
+        except Exception as e:
+            print(f"Error in email_tools_chat_stream: {str(e)}")
+            yield _sse_event("done", {
+                "success": False,
+                "message": "I'm having trouble processing your email request. Please try again or contact support if the issue persists.",
+                "tool_results": [],
+                "has_tool_calls": False
+            })
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Existing endpoints (keep these if they exist in your original file)
 @router.get("/history", response_model=List[EmailHistoryResponse])
 async def get_email_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    recipient: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get email history for current user"""
-    history = db.query(EmailHistory).filter(
-        EmailHistory.user_id == current_user.id
-    ).order_by(EmailHistory.created_at.desc()).all()
+    """Get one page of email history for current user (next page cursor in X-Next-Cursor)"""
+    query = db.query(EmailHistory).filter(EmailHistory.user_id == current_user.id)
+    query = filter_email_history(query, recipient, status, date_from, date_to)
+    history, next_cursor = paginate_email_history(query, cursor, limit)
+    set_next_cursor(response, next_cursor)
     return history
 
 @router.get("/admin/history", response_model=List[EmailHistoryResponse])
 async def get_admin_email_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    recipient: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    stream: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all email history (admin only)"""
+    """Get one page of all email history (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    history = db.query(EmailHistory).order_by(EmailHistory.created_at.desc()).all()
-    return history
+    # Same projected query as the history tool's admin listing
+    from app.tools.save_email_history_tool.history_functions import get_email_history as get_history_page
+    return await get_history_page(
+        response=response, cursor=cursor, limit=limit, recipient=recipient, status=status,
+        date_from=date_from, date_to=date_to, stream=stream, db=db, admin=current_user
+    )
 
 # Add this endpoint to check registered tools
 @router.get("/available-tools")
@@ -239,11 +373,12 @@ async def archive_email_endpoint(
         # Import here to avoid circular import issues
         from app.tools.read_gmail_tool.gmail_client import GmailClient
         
-        client = GmailClient()
-        service = client.authenticate(current_user.id, db)
+        def _archive():
+            client = GmailClient()
+            service = client.authenticate(current_user.id, db)
+            return client.archive_email(request.message_id)
         
-        result = client.archive_email(request.message_id)
-        return result
+        return await run_blocking("gmail", _archive)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to archive email: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+Per-user in-memory index for fuzzy contact matching.
+
+lookup_email_by_name only finds exact (normalized) names, so "Jon" or
+"Smith" miss and the chat has to ask the user. Each user's mappings are
+loaded once into a word-prefix trie and a trigram index, which resolve
+partial and misspelled names to ranked candidates without touching the
+database. Indexes expire after a TTL and are updated in place when
+add_name_email_mapping writes.
+
+Each worker holds its own indexes, so one may lag behind a mapping changed
+through another worker until the TTL runs out. Candidates are only
+suggestions; resolve_contact re-reads a mapping from email_name_maps
+before using its address and rebuilds the index when it has moved on.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List, Set
+
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+
+from app.common.metrics import metrics_registry
+from app.common.models import EmailNameMap
+from app.common.utils import normalize_name
+
+# Scores for each kind of match; trigram matches score their similarity (below 0.9)
+EXACT_SCORE = 1.0
+WORD_SCORE = 0.95
+PREFIX_SCORE = 0.9
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Trigrams of each word padded like pg_trgm, so word starts weigh more"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _TrieNode:
+    __slots__ = ("children", "keys")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.keys: Set[str] = set()
+
+
+class UserContactIndex:
+    """Trie and trigram index over one user's name mappings"""
+
+    def __init__(self):
+        self.contacts: Dict[str, Dict[str, str]] = {}
+        self._trie = _TrieNode()
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def add(self, name: str, email_address: str):
+        """Add or update a mapping"""
+        name_key = normalize_name(name)
+        if not name_key:
+            return
+        if name_key in self.contacts:
+            # Same key, so the trie and trigram entries are already in place
+            self.contacts[name_key]["email_address"] = email_address
+            return
+
+        self.contacts[name_key] = {"name": name, "email_address": email_address}
+
+        # Index the full name and every word so "smith" finds "john smith"
+        words = name_key.split()
+        for start in range(len(words)):
+            node = self._trie
+            for char in " ".join(words[start:]):
+                node = node.children.setdefault(char, _TrieNode())
+                node.keys.add(name_key)
+
+        for gram in _trigrams(name_key):
+            self._trigrams.setdefault(gram, set()).add(name_key)
+
+    def _prefix_matches(self, query_key: str) -> Set[str]:
+        node = self._trie
+        for char in query_key:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.keys
+
+    def search(self, query: str, limit: int = 5, min_similarity: float = 0.4) -> List[Dict[str, Any]]:
+        """Return up to `limit` candidates ranked by match score"""
+        query_key = normalize_name(query)
+        if not query_key:
+            return []
+
+        scores: Dict[str, float] = {}
+        match_types: Dict[str, str] = {}
+
+        if query_key in self.contacts:
+            scores[query_key] = EXACT_SCORE
+            match_types[query_key] = "exact"
+
+        for name_key in self._prefix_matches(query_key):
+            if name_key in scores:
+                continue
+            # "smith" matching the whole word in "john smith" beats "smithers"
+            if f" {query_key} " in f" {name_key} ":
+                scores[name_key] = WORD_SCORE
+                match_types[name_key] = "word"
+            else:
+                scores[name_key] = PREFIX_SCORE
+                match_types[name_key] = "prefix"
+
+        # Share of the query's trigrams found in the name, for typos ("jonh" -> "john")
+        query_grams = _trigrams(query_key)
+        overlaps: Dict[str, int] = {}
+        for gram in query_grams:
+            for name_key in self._trigrams.get(gram, ()):
+                overlaps[name_key] = overlaps.get(name_key, 0) + 1
+        for name_key, overlap in overlaps.items():
+            if name_key in scores:
+                continue
+            similarity = min(overlap / len(query_grams), 0.85)
+            if similarity >= min_similarity:
+                scores[name_key] = round(similarity, 3)
+                match_types[name_key] = "similar"
+
+        ranked = sorted(scores, key=lambda name_key: (-scores[name_key], len(name_key), name_key))
+        return [{
+            "name": self.contacts[name_key]["name"],
+            "email_address": self.contacts[name_key]["email_address"],
+            "score": scores[name_key],
+            "match": match_types[name_key]
+        } for name_key in ranked[:limit]]
+
+
+class ContactIndex:
+    def __init__(self, maxsize: int = 1024, ttl: int = 600):
+        self.ttl = ttl
+        self._indexes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.incremental_updates = 0
+        self.searches = 0
+        self.total_search_seconds = 0.0
+
+    def _get_index(self, user_id: int, db: Session) -> UserContactIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+        if index is not None:
+            return index
+
+        rows = db.query(EmailNameMap.name, EmailNameMap.email_address).filter(
+            EmailNameMap.user_id == user_id
+        ).all()
+        index = UserContactIndex()
+        for name, email_address in rows:
+            index.add(name, email_address)
+
+        with self._lock:
+            self._indexes[user_id] = index
+            self.builds += 1
+        return index
+
+    def search(self, query: str, user_id: int, db: Session, limit: int = 5) -> List[Dict[str, Any]]:
+        """Ranked contact candidates for a partial or misspelled name"""
+        index = self._get_index(user_id, db)
+        started_at = time.perf_counter()
+        with self._lock:
+            candidates = index.search(query, limit=limit)
+            self.searches += 1
+            self.total_search_seconds += time.perf_counter() - started_at
+        return candidates
+
+    def add_mapping(self, user_id: int, name: str, email_address: str):
+        """Apply a new or updated mapping to an already built index"""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                index.add(name, email_address)
+                self.incremental_updates += 1
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "indexed_users": len(self._indexes),
+                "ttl": self.ttl,
+                "builds": self.builds,
+                "incremental_updates": self.incremental_updates,
+                "searches": self.searches,
+                "avg_search_ms": round(self.total_search_seconds * 1000 / self.searches, 4) if self.searches else 0.0
+            }
+
+
+# Global contact index instance
+contact_index = ContactIndex(
+    maxsize=int(os.getenv("CONTACT_INDEX_SIZE", "1024")),
+    ttl=int(os.getenv("CONTACT_INDEX_TTL", "600"))
+)
+metrics_registry.register("contact_index", contact_index.stats)
@@ -3,22 +3,70 @@ from sqlalchemy.orm import Session
 from app.common.database import get_db
 from app.common.auth import get_current_user
 from app.common.models import User, EmailNameMap
+from app.common.utils import normalize_name
+from app.tools.lookup_contact_tool.contact_index import contact_index, PREFIX_SCORE
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 router = APIRouter()
 
 def lookup_email_by_name(name: str, user_id: int, db: Session) -> Optional[str]:
     mapping = db.query(EmailNameMap).filter(
         EmailNameMap.user_id == user_id,
-        EmailNameMap.name.ilike(name)
+        EmailNameMap.name_key == normalize_name(name)
     ).first()
     
     return mapping.email_address if mapping else None
 
+def find_contact_candidates(name: str, user_id: int, db: Session, limit: int = 5) -> List[Dict[str, Any]]:
+    """Ranked fuzzy matches for a name that has no exact mapping"""
+    return contact_index.search(name, user_id, db, limit=limit)
+
+# Shorter names ("j", "al") are confirmed with the user even when one contact fits
+MIN_RESOLVE_CHARS = 3
+
+def resolve_single_candidate(name: str, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Return the candidate when exactly one contact matches by name or name
+    prefix and that match is the whole name or a whole word of it. Prefix
+    and similar-spelling matches are left for the user to confirm.
+    """
+    if len(normalize_name(name)) < MIN_RESOLVE_CHARS:
+        return None
+    strong = [candidate for candidate in candidates if candidate["score"] >= PREFIX_SCORE]
+    if len(strong) == 1 and strong[0]["match"] in ("exact", "word"):
+        return strong[0]
+    return None
+
+def resolve_contact(name: str, user_id: int, db: Session) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Fuzzy-match a name without an exact mapping: (match, candidates), where
+    match is only set when the name resolves to one contact whose mapping
+    is still stored with that address.
+    """
+    candidates = find_contact_candidates(name, user_id, db)
+    match = resolve_single_candidate(name, candidates)
+    if match is None or lookup_email_by_name(match["name"], user_id, db) == match["email_address"]:
+        return match, candidates
+
+    # Another worker changed or removed the mapping after this worker built its index
+    contact_index.invalidate(user_id)
+    candidates = find_contact_candidates(name, user_id, db)
+    return resolve_single_candidate(name, candidates), candidates
+
 class EmailLookupRequest(BaseModel):
     name: str
 
+@router.get("/contacts/search")
+async def search_contacts(
+    q: str,
+    limit: int = 5,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    candidates = find_contact_candidates(q, current_user.id, db, limit=min(max(limit, 1), 20))
+    return {"success": True, "candidates": candidates}
+
 @router.get("/name-mappings/{name}")
 async def get_email_by_name(
     name: str,
@@ -0,0 +1,202 @@
+# backend/app/tools/read_gmail_tool/credential_cache.py
+"""
+Process-wide cache of Gmail OAuth credentials, one entry per user.
+
+Without it every Gmail request read oauth_tokens and rebuilt Credentials,
+and when the access token had expired every concurrent request refreshed
+it and wrote it back at the same time. Here credentials are served from
+memory and refreshed a few minutes before they expire. Only one thread
+per user refreshes while the others wait for its result (single flight),
+and the write-back only applies if the row's version is unchanged, so a
+refresh done by another worker is picked up instead of overwritten.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.common.database import SessionLocal
+from app.common.metrics import metrics_registry
+from app.common.models import OAuthToken
+
+GMAIL_SERVICE = 'gmail'
+
+
+def credentials_to_token_data(credentials: Credentials) -> Dict[str, Any]:
+    """Serialize credentials into the JSON stored in oauth_tokens.token_data"""
+    return {
+        'token': credentials.token,
+        'refresh_token': credentials.refresh_token,
+        'token_uri': credentials.token_uri,
+        'client_id': credentials.client_id,
+        'client_secret': credentials.client_secret,
+        'scopes': credentials.scopes,
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None
+    }
+
+
+def credentials_from_token_data(token_data: Dict[str, Any]) -> Credentials:
+    """Rebuild credentials from oauth_tokens.token_data"""
+    credentials = Credentials(
+        token=token_data.get('token'),
+        refresh_token=token_data.get('refresh_token'),
+        token_uri=token_data.get('token_uri'),
+        client_id=token_data.get('client_id'),
+        client_secret=token_data.get('client_secret'),
+        scopes=token_data.get('scopes')
+    )
+    if token_data.get('expiry'):
+        credentials.expiry = datetime.fromisoformat(token_data['expiry'])
+    return credentials
+
+
+class GmailCredentialCache:
+    def __init__(self, maxsize: int = 1024, ttl: int = 3600, refresh_margin: int = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+
+        self.hits = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.version_conflicts = 0
+
+    def _needs_refresh(self, credentials: Credentials) -> bool:
+        if not credentials.token:
+            return True
+        if credentials.expiry is None:
+            return False
+        return credentials.expiry - self.refresh_margin <= datetime.utcnow()
+
+    def _user_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(key)
+            if lock is None:
+                lock = self._user_locks[key] = threading.Lock()
+            return lock
+
+    def _cached(self, key: str) -> Optional[Credentials]:
+        with self._lock:
+            credentials = self._cache.get(key)
+            if credentials is not None and not self._needs_refresh(credentials):
+                self.hits += 1
+                return credentials
+        return None
+
+    def get_credentials(self, user_id, db: Session = None) -> Optional[Credentials]:
+        """
+        Return usable credentials for the user, or None when there is no
+        stored token or it cannot be refreshed (re-authentication needed).
+        A database session is only opened when the cache cannot answer.
+        """
+        key = str(user_id)
+        credentials = self._cached(key)
+        if credentials is not None:
+            return credentials
+
+        # Single flight: one thread loads/refreshes, the rest wait and reuse it
+        with self._user_lock(key):
+            credentials = self._cached(key)
+            if credentials is not None:
+                return credentials
+
+            own_session = db is None
+            if own_session:
+                db = SessionLocal()
+            try:
+                return self._load_and_refresh(key, user_id, db)
+            finally:
+                if own_session:
+                    db.close()
+
+    def _load_row(self, user_id, db: Session) -> Optional[OAuthToken]:
+        with self._lock:
+            self.loads += 1
+        return db.query(OAuthToken).filter(
+            OAuthToken.user_id == user_id,
+            OAuthToken.service == GMAIL_SERVICE
+        ).populate_existing().first()
+
+    def _load_and_refresh(self, key: str, user_id, db: Session) -> Optional[Credentials]:
+        token_row = self._load_row(user_id, db)
+        if token_row is None:
+            return None
+
+        credentials = credentials_from_token_data(token_row.token_data)
+        row_id, version = token_row.id, token_row.version
+
+        if self._needs_refresh(credentials):
+            if not credentials.refresh_token:
+                return None
+            try:
+                print(f"Refreshing Gmail token for user {user_id}")
+                credentials.refresh(Request())
+            except Exception as e:
+                print(f"Error refreshing token: {e}")
+                with self._lock:
+                    self.refresh_failures += 1
+                return None
+
+            with self._lock:
+                self.refreshes += 1
+
+            # Optimistic write-back: only succeeds if nobody else updated the row
+            result = db.execute(
+                update(OAuthToken)
+                .where(OAuthToken.id == row_id, OAuthToken.version == version)
+                .values(
+                    token_data=credentials_to_token_data(credentials),
+                    version=version + 1,
+                    updated_at=datetime.utcnow()
+                )
+            )
+            db.commit()
+
+            if result.rowcount != 1:
+                # Another worker refreshed first; use what it stored
+                with self._lock:
+                    self.version_conflicts += 1
+                token_row = self._load_row(user_id, db)
+                if token_row is None:
+                    return None
+                stored = credentials_from_token_data(token_row.token_data)
+                if not self._needs_refresh(stored):
+                    credentials = stored
+
+        with self._lock:
+            self._cache[key] = credentials
+        return credentials
+
+    def invalidate(self, user_id):
+        """Drop the cached credentials for a user (token stored or cleared)"""
+        with self._lock:
+            self._cache.pop(str(user_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "refresh_margin_seconds": int(self.refresh_margin.total_seconds()),
+                "hits": self.hits,
+                "loads": self.loads,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "version_conflicts": self.version_conflicts
+            }
+
+
+# Global credential cache instance
+gmail_credential_cache = GmailCredentialCache(
+    maxsize=int(os.getenv("GMAIL_CREDENTIAL_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("GMAIL_CREDENTIAL_CACHE_TTL", "3600")),
+    refresh_margin=int(os.getenv("GMAIL_TOKEN_REFRESH_MARGIN", "300"))
+)
+metrics_registry.register("gmail_credential_cache", gmail_credential_cache.stats)
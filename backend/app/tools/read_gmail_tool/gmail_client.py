@@ -1,19 +1,27 @@
 # In backend/app/tools/read_gmail_tool/gmail_client.py
 
 import os
-import base64
 import json
 from pathlib import Path
 from fastapi import HTTPException
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow, Flow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from .service_cache import gmail_service_cache
+from .credential_cache import gmail_credential_cache, credentials_to_token_data, credentials_from_token_data
+from .sync_engine import gmail_sync_engine
+from .message_store import gmail_message_store
+from .mime import extract_body
+from .push import gmail_push
+
 class GmailClient:
+    # Gmail accepts up to 100 calls per batch request; smaller chunks avoid per-batch rate limiting
+    BATCH_SIZE = 50
+
     def __init__(self):
         self.SCOPES = [
             'https://www.googleapis.com/auth/gmail.readonly',
@@ -21,6 +29,8 @@ class GmailClient:
             'https://www.googleapis.com/auth/gmail.compose'
         ]
         self.service = None
+        self.user_id = None
+        self.last_fetch_errors = {}
         
         # Environment detection
         self.is_production = os.getenv('RENDER', False) or os.getenv('ENVIRONMENT') == 'production'
@@ -67,11 +77,22 @@ class GmailClient:
                         else "Gmail credentials not configured. Please set up OAuth credentials.")
             raise HTTPException(status_code=501, detail=error_msg)
         
+        # Scopes the local message store
+        self.user_id = user_id
+        
         if self.is_production:
             return self._authenticate_production(user_id, db)
         else:
             return self._authenticate_local(user_id)
 
+    def has_stored_credentials(self, user_id, db: Session = None):
+        """True when the user has already authorized Gmail (never starts an OAuth flow)"""
+        if not self.is_configured():
+            return False
+        if self.is_production:
+            return gmail_credential_cache.get_credentials(user_id, db) is not None
+        return (self.tokens_dir / f"{user_id}_token.json").exists()
+
     def _authenticate_local(self, user_id):
         """Original local authentication method - PRESERVED EXACTLY"""
         creds = None
@@ -144,7 +165,7 @@ class GmailClient:
                     detail="Failed to obtain valid credentials after authentication attempt"
                 )
         
-        self.service = build('gmail', 'v1', credentials=creds)
+        self.service = gmail_service_cache.get_service(user_id, creds)
         return self.service
 
     def _authenticate_production(self, user_id, db: Session = None):
@@ -158,34 +179,22 @@ class GmailClient:
                     detail="Database session required for production authentication"
                 )
             
-            # Try to get existing token from database
-            creds = self.get_oauth_token_from_db(user_id, db)
-            
-            if not creds or not creds.valid:
-                if creds and creds.expired and creds.refresh_token:
-                    try:
-                        print("Refreshing expired token...")
-                        creds.refresh(Request())
-                        # Update token in database
-                        self.store_oauth_token(user_id, creds, db)
-                        print("Token refreshed successfully")
-                    except Exception as e:
-                        print(f"Error refreshing token: {e}")
-                        creds = None
-                
-                if not creds:
-                    # No valid token, need to start OAuth flow
-                    auth_url = self.get_auth_url(user_id)
-                    raise HTTPException(
+            # Cached credentials, refreshed shortly before expiry (only one refresh per user at a time)
+            creds = gmail_credential_cache.get_credentials(user_id, db)
+            
+            if not creds:
+                # No valid token, need to start OAuth flow
+                auth_url = self.get_auth_url(user_id)
+                raise HTTPException(
                         status_code=401,
-                        detail={
-                            "message": "Gmail authentication required",
-                            "auth_url": auth_url,
-                            "instructions": "Please visit the auth_url to authenticate Gmail access"
-                        }
-                    )
+                    detail={
+                        "message": "Gmail authentication required",
+                        "auth_url": auth_url,
+                        "instructions": "Please visit the auth_url to authenticate Gmail access"
+                    }
+                )
             
-            self.service = build('gmail', 'v1', credentials=creds)
+            self.service = gmail_service_cache.get_service(user_id, creds)
             return self.service
             
         except HTTPException:
@@ -204,45 +213,22 @@ class GmailClient:
             raise Exception("Gmail service not initialized. Call authenticate() first.")
             
         try:
-            print(f"Fetching {max_results} emails from inbox...")
-            results = self.service.users().messages().list(
-                userId='me', 
-                maxResults=max_results,
-                labelIds=['INBOX']
-            ).execute()
-            
-            messages = results.get('messages', [])
-            emails = []
+            message_ids = self.list_inbox_message_ids(max_results)
             
-            print(f"Found {len(messages)} messages")
+            # Fetch all metadata through the batch endpoint instead of one round trip per message
+            fetched, errors = self._batch_get_messages(
+                message_ids,
+                format='metadata',
+                metadataHeaders=['Subject', 'From', 'Date']
+            )
+            self.last_fetch_errors = errors
             
-            for message in messages:
-                msg = self.service.users().messages().get(
-                    userId='me', 
-                    id=message['id'],
-                    format='metadata',
-                    metadataHeaders=['Subject', 'From', 'Date']
-                ).execute()
-                
-                headers = msg.get('payload', {}).get('headers', [])
-                email_data = {
-                    'id': msg['id'],
-                    'snippet': msg.get('snippet', ''),
-                    'subject': '',
-                    'from': '',
-                    'date': '',
-                    'threadId': msg.get('threadId')
-                }
-                
-                for header in headers:
-                    if header['name'] == 'Subject':
-                        email_data['subject'] = header['value']
-                    elif header['name'] == 'From':
-                        email_data['from'] = header['value']
-                    elif header['name'] == 'Date':
-                        email_data['date'] = header['value']
-                
-                emails.append(email_data)
+            emails = []
+            for message_id in message_ids:
+                if message_id in errors:
+                    print(f"Failed to fetch message {message_id}: {errors[message_id]}")
+                    continue
+                emails.append(self._parse_message_metadata(fetched[message_id]))
             
             print(f"Processed {len(emails)} emails")
             return emails
@@ -251,6 +237,149 @@ class GmailClient:
             print(f'Gmail API error occurred: {error}')
             return []
 
+    def get_full_messages(self, message_ids):
+        """Fetch messages with headers, snippet and body, in the order given.
+        
+        Messages already in the local store are read from it; only the rest
+        are downloaded (one format='full' fetch each, carrying everything) and
+        written through. Messages that fail to fetch are left out and recorded
+        in last_fetch_errors.
+        """
+        stored = gmail_message_store.get_messages(self.user_id, message_ids, with_headers=True) if self.user_id is not None else {}
+        missing_ids = [message_id for message_id in message_ids if message_id not in stored]
+        
+        fetched, errors = self._batch_get_messages(missing_ids, format='full')
+        self.last_fetch_errors = errors
+        
+        downloaded = {}
+        for message_id in missing_ids:
+            if message_id in errors:
+                print(f"Failed to fetch message {message_id}: {errors[message_id]}")
+                continue
+            msg = fetched[message_id]
+            email_data = self._parse_message_metadata(msg)
+            email_data['body'] = self._extract_email_body(msg.get('payload', {}))
+            email_data['labelIds'] = msg.get('labelIds', [])
+            email_data['internalDate'] = int(msg.get('internalDate') or 0)
+            downloaded[message_id] = email_data
+        
+        if downloaded and self.user_id is not None:
+            gmail_message_store.save_messages(self.user_id, list(downloaded.values()))
+        
+        return [stored.get(message_id) or downloaded[message_id]
+                for message_id in message_ids if message_id in stored or message_id in downloaded]
+
+    def get_history_id(self):
+        """Current mailbox historyId, the starting point for incremental sync"""
+        profile = self.service.users().getProfile(userId='me').execute()
+        return profile['historyId']
+
+    def get_email_address(self):
+        """Address of the authenticated mailbox (push notifications are keyed by it)"""
+        profile = self.service.users().getProfile(userId='me').execute()
+        return profile['emailAddress']
+
+    def watch_inbox(self, topic_name):
+        """Ask Gmail to publish inbox changes to a Cloud Pub/Sub topic.
+        
+        Returns Gmail's response: the current historyId and the expiration
+        (epoch milliseconds). Watches last about a week and must be renewed.
+        """
+        return self.service.users().watch(userId='me', body={
+            'topicName': topic_name,
+            'labelIds': ['INBOX'],
+            'labelFilterBehavior': 'INCLUDE'
+        }).execute()
+
+    def stop_watch(self):
+        """Stop push notifications for the mailbox"""
+        self.service.users().stop(userId='me').execute()
+
+    def list_history(self, start_history_id):
+        """List mailbox changes since start_history_id.
+        
+        Returns (history records, latest historyId). Raises HttpError 404 when
+        start_history_id is too old and a full sync is needed.
+        """
+        records = []
+        latest_history_id = start_history_id
+        page_token = None
+        while True:
+            kwargs = {
+                'userId': 'me',
+                'startHistoryId': start_history_id,
+                'historyTypes': ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+            }
+            if page_token:
+                kwargs['pageToken'] = page_token
+            response = self.service.users().history().list(**kwargs).execute()
+            records.extend(response.get('history', []))
+            latest_history_id = response.get('historyId', latest_history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return records, latest_history_id
+
+    def list_inbox_message_ids(self, max_results):
+        """List the ids of the newest inbox messages"""
+        print(f"Fetching {max_results} emails from inbox...")
+        results = self.service.users().messages().list(
+            userId='me', 
+            maxResults=max_results,
+            labelIds=['INBOX']
+        ).execute()
+        
+        messages = results.get('messages', [])
+        print(f"Found {len(messages)} messages")
+        return [message['id'] for message in messages]
+
+    def _batch_get_messages(self, message_ids, **get_kwargs):
+        """Fetch messages in chunks through the Gmail batch HTTP endpoint.
+        
+        Returns a tuple of (messages keyed by id, error strings keyed by id) so
+        one bad message does not fail the whole fetch.
+        """
+        fetched = {}
+        errors = {}
+        
+        def _collect(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = str(exception)
+            else:
+                fetched[request_id] = response
+        
+        for start in range(0, len(message_ids), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=_collect)
+            for message_id in message_ids[start:start + self.BATCH_SIZE]:
+                batch.add(
+                    self.service.users().messages().get(userId='me', id=message_id, **get_kwargs),
+                    request_id=message_id
+                )
+            batch.execute()
+        
+        return fetched, errors
+
+    def _parse_message_metadata(self, msg):
+        """Build the inbox email dict from a Gmail message resource"""
+        headers = msg.get('payload', {}).get('headers', [])
+        email_data = {
+            'id': msg['id'],
+            'snippet': msg.get('snippet', ''),
+            'subject': '',
+            'from': '',
+            'date': '',
+            'threadId': msg.get('threadId')
+        }
+        
+        for header in headers:
+            if header['name'] == 'Subject':
+                email_data['subject'] = header['value']
+            elif header['name'] == 'From':
+                email_data['from'] = header['value']
+            elif header['name'] == 'Date':
+                email_data['date'] = header['value']
+        
+        return email_data
+
     def archive_email(self, message_id):
         """Archive an email by removing the INBOX label"""
         if not self.service:
@@ -287,13 +416,21 @@ class GmailClient:
             raise Exception("Gmail service not initialized. Call authenticate() first.")
             
         try:
+            if self.user_id is not None:
+                stored = gmail_message_store.get_message(self.user_id, message_id)
+                if stored is not None:
+                    return stored['body']
+            
             message = self.service.users().messages().get(
                 userId='me',
                 id=message_id,
                 format='full'
             ).execute()
             
-            return self._extract_email_body(message.get('payload', {}))
+            body = self._extract_email_body(message.get('payload', {}))
+            if self.user_id is not None:
+                gmail_message_store.save_body(self.user_id, message_id, body)
+            return body
             
         except HttpError as error:
             print(f'Error getting email body: {error}')
@@ -301,24 +438,7 @@ class GmailClient:
 
     def _extract_email_body(self, payload):
         """Extract the email body from the message payload"""
-        body = ""
-        
-        if 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain':
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        break
-                elif part['mimeType'] == 'text/html' and not body:
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        import re
-                        body = re.sub('<[^<]+?>', '', body)
-        else:
-            if 'body' in payload and 'data' in payload['body']:
-                body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
-        
-        return body if body else "No content available"
+        return extract_body(payload)
     
     def get_auth_url(self, user_id):
         """Generate OAuth authorization URL for production"""
@@ -367,15 +487,7 @@ class GmailClient:
             from app.common.models import OAuthToken
             
             # Convert credentials to JSON
-            token_data = {
-                'token': credentials.token,
-                'refresh_token': credentials.refresh_token,
-                'token_uri': credentials.token_uri,
-                'client_id': credentials.client_id,
-                'client_secret': credentials.client_secret,
-                'scopes': credentials.scopes,
-                'expiry': credentials.expiry.isoformat() if credentials.expiry else None
-            }
+            token_data = credentials_to_token_data(credentials)
             
             # Check if token already exists
             existing_token = db.query(OAuthToken).filter(
@@ -386,6 +498,7 @@ class GmailClient:
             if existing_token:
                 # Update existing token
                 existing_token.token_data = token_data
+                existing_token.version = (existing_token.version or 0) + 1
                 existing_token.updated_at = datetime.utcnow()
             else:
                 # Create new token
@@ -397,6 +510,11 @@ class GmailClient:
                 db.add(oauth_token)
             
             db.commit()
+            gmail_service_cache.invalidate(user_id)
+            gmail_credential_cache.invalidate(user_id)
+            gmail_sync_engine.reset(user_id)
+            # The watch belonged to the previous authorization
+            gmail_push.forget(user_id, db)
             print(f"OAuth token stored for user {user_id}")
             
         except Exception as e:
@@ -416,24 +534,8 @@ class GmailClient:
             if not oauth_token:
                 return None
             
-            token_data = oauth_token.token_data
-            
             # Reconstruct credentials from stored data
-            credentials = Credentials(
-                token=token_data.get('token'),
-                refresh_token=token_data.get('refresh_token'),
-                token_uri=token_data.get('token_uri'),
-                client_id=token_data.get('client_id'),
-                client_secret=token_data.get('client_secret'),
-                scopes=token_data.get('scopes')
-            )
-            
-            # Set expiry if available
-            if token_data.get('expiry'):
-                from datetime import datetime
-                credentials.expiry = datetime.fromisoformat(token_data['expiry'])
-            
-            return credentials
+            return credentials_from_token_data(oauth_token.token_data)
             
         except Exception as e:
             print(f"Error retrieving OAuth token: {e}")
@@ -459,6 +561,11 @@ class GmailClient:
             ).delete()
             
             db.commit()
+            gmail_service_cache.invalidate(user_id)
+            gmail_credential_cache.invalidate(user_id)
+            gmail_sync_engine.reset(user_id)
+            # The watch belonged to the previous authorization
+            gmail_push.forget(user_id, db)
             print(f"Cleared existing tokens for user {user_id}")
             
         except Exception as e:
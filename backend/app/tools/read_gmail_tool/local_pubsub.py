@@ -0,0 +1,75 @@
+# backend/app/tools/read_gmail_tool/local_pubsub.py
+"""
+Local stand-in for the Cloud Pub/Sub push subscription.
+
+Builds the same envelope Pub/Sub pushes for a Gmail notification and posts
+it to the push endpoint, so the webhook and incremental sync can be
+exercised without a Google Cloud project.
+
+USAGE (from the backend directory, with the API running):
+   python -m app.tools.read_gmail_tool.local_pubsub user@gmail.com 123456
+
+The push URL and token default to http://localhost:8000/email-tools/gmail/push
+and GMAIL_PUSH_TOKEN; override them with --url and --token.
+"""
+import argparse
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+import requests
+
+DEFAULT_PUSH_URL = "http://localhost:8000/email-tools/gmail/push"
+LOCAL_SUBSCRIPTION = "projects/local/subscriptions/gmail-push"
+
+
+def build_push_envelope(email_address: str, history_id: int,
+                        subscription: str = LOCAL_SUBSCRIPTION) -> Dict[str, Any]:
+    """The JSON body Pub/Sub posts to a push endpoint for a Gmail notification"""
+    data = json.dumps({"emailAddress": email_address, "historyId": int(history_id)})
+    message_id = uuid.uuid4().hex
+    return {
+        "message": {
+            "data": base64.b64encode(data.encode("utf-8")).decode("ascii"),
+            "messageId": message_id,
+            "message_id": message_id,
+            "publishTime": datetime.utcnow().isoformat() + "Z"
+        },
+        "subscription": subscription
+    }
+
+
+class LocalPubSubPublisher:
+    def __init__(self, push_url: str = DEFAULT_PUSH_URL, token: str = None, client=None):
+        self.push_url = push_url
+        self.token = token if token is not None else os.getenv("GMAIL_PUSH_TOKEN")
+        # Anything with a requests-style post(), e.g. a requests.Session or FastAPI's TestClient
+        self.client = client or requests
+
+    def publish(self, email_address: str, history_id: int):
+        """Deliver one notification to the push endpoint and return the response"""
+        return self.client.post(
+            self.push_url,
+            params={"token": self.token} if self.token else None,
+            json=build_push_envelope(email_address, history_id),
+            timeout=10
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a Gmail push notification to the local API")
+    parser.add_argument("email_address", help="Mailbox address the notification is for")
+    parser.add_argument("history_id", type=int, help="New mailbox historyId")
+    parser.add_argument("--url", default=DEFAULT_PUSH_URL, help="Push endpoint URL")
+    parser.add_argument("--token", default=None, help="Push token (defaults to GMAIL_PUSH_TOKEN)")
+    args = parser.parse_args()
+
+    response = LocalPubSubPublisher(args.url, args.token).publish(args.email_address, args.history_id)
+    print(f"{response.status_code}: {response.text}")
+
+
+if __name__ == "__main__":
+    main()
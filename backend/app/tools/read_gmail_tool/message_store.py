@@ -0,0 +1,214 @@
+# backend/app/tools/read_gmail_tool/message_store.py
+"""
+Database-backed store of fetched Gmail messages (the gmail_messages table).
+
+Every message downloaded from Gmail is written through to the store and
+every view reads it first, so opening an email that was already fetched is
+one indexed read on (user_id, message_id) instead of a Gmail round trip and
+a re-parse, and the cache survives restarts and is shared by all workers.
+Bodies are the bulky part: once a user's stored bodies exceed a byte budget
+the least recently viewed ones are dropped (headers and snippet stay).
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.common.database import SessionLocal
+from app.common.metrics import metrics_registry
+from app.common.models import GmailMessage
+
+# Views only refresh last_accessed_at when it is older than this, so reads rarely write
+TOUCH_INTERVAL = timedelta(minutes=10)
+
+
+def _to_email(row: GmailMessage) -> Dict[str, Any]:
+    """Convert a stored row into the dict shape GmailClient returns"""
+    return {
+        'id': row.message_id,
+        'threadId': row.thread_id,
+        'subject': row.subject or '',
+        'from': row.from_address or '',
+        'date': row.date or '',
+        'snippet': row.snippet or '',
+        'body': row.body,
+        'labelIds': row.label_ids or [],
+        'internalDate': row.internal_date or 0
+    }
+
+
+class GmailMessageStore:
+    def __init__(self, max_body_bytes_per_user: int = 5 * 1024 * 1024):
+        self.max_body_bytes_per_user = max_body_bytes_per_user
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evicted_bodies = 0
+
+    def _count(self, hits: int = 0, misses: int = 0, writes: int = 0, evicted: int = 0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.writes += writes
+            self.evicted_bodies += evicted
+
+    def get_messages(self, user_id, message_ids: List[str], with_headers: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Stored messages that still have their body, keyed by message id.
+        with_headers=True skips rows saved from a body-only fetch.
+        """
+        if not message_ids:
+            return {}
+        db = SessionLocal()
+        try:
+            query = db.query(GmailMessage).filter(
+                GmailMessage.user_id == user_id,
+                GmailMessage.message_id.in_(message_ids),
+                GmailMessage.body.isnot(None)
+            )
+            if with_headers:
+                query = query.filter(GmailMessage.internal_date.isnot(None))
+            rows = query.all()
+            found = {row.message_id: _to_email(row) for row in rows}
+
+            # Keep eviction order current without writing on every view
+            now = datetime.utcnow()
+            stale = [row for row in rows if not row.last_accessed_at or now - row.last_accessed_at > TOUCH_INTERVAL]
+            if stale:
+                for row in stale:
+                    row.last_accessed_at = now
+                db.commit()
+        finally:
+            db.close()
+
+        self._count(hits=len(found), misses=len(message_ids) - len(found))
+        return found
+
+    def get_message(self, user_id, message_id: str) -> Optional[Dict[str, Any]]:
+        """A single stored message with its body, or None"""
+        return self.get_messages(user_id, [message_id]).get(message_id)
+
+    def save_messages(self, user_id, emails: List[Dict[str, Any]]):
+        """Write fetched messages through to the store (insert or refresh)"""
+        if not emails:
+            return
+        db = SessionLocal()
+        try:
+            existing = {
+                row.message_id: row
+                for row in db.query(GmailMessage).filter(
+                    GmailMessage.user_id == user_id,
+                    GmailMessage.message_id.in_([email['id'] for email in emails])
+                )
+            }
+            now = datetime.utcnow()
+            for email in emails:
+                row = existing.get(email['id'])
+                if row is None:
+                    row = GmailMessage(user_id=user_id, message_id=email['id'])
+                    db.add(row)
+                body = email.get('body')
+                row.thread_id = email.get('threadId')
+                row.subject = email.get('subject')
+                row.from_address = email.get('from')
+                row.date = email.get('date')
+                row.snippet = email.get('snippet')
+                row.body = body
+                row.body_size = len(body.encode('utf-8')) if body else 0
+                row.label_ids = email.get('labelIds')
+                row.internal_date = email.get('internalDate')
+                row.fetched_at = now
+                row.last_accessed_at = now
+            db.commit()
+            self._count(writes=len(emails))
+            self._evict_bodies(user_id, db)
+        except IntegrityError:
+            # Another worker stored the same message first; the cache is still warm
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            print(f"Error storing Gmail messages: {e}")
+        finally:
+            db.close()
+
+    def save_body(self, user_id, message_id: str, body: str):
+        """Store a body fetched on its own (headers are filled in by inbox reads)"""
+        if not self._update_body(user_id, message_id, body):
+            self.save_messages(user_id, [{'id': message_id, 'body': body}])
+
+    def _update_body(self, user_id, message_id: str, body: str) -> bool:
+        """Store the body on an existing row; False when it was not stored"""
+        db = SessionLocal()
+        updated = False
+        try:
+            row = db.query(GmailMessage).filter(
+                GmailMessage.user_id == user_id,
+                GmailMessage.message_id == message_id
+            ).first()
+            if row is None:
+                return False
+            row.body = body
+            row.body_size = len(body.encode('utf-8')) if body else 0
+            row.last_accessed_at = datetime.utcnow()
+            db.commit()
+            updated = True
+            self._count(writes=1)
+            self._evict_bodies(user_id, db)
+            return True
+        except Exception as e:
+            db.rollback()
+            print(f"Error storing Gmail message body: {e}")
+            # Only an eviction failure leaves the body stored; otherwise let the caller insert it
+            return updated
+        finally:
+            db.close()
+
+    def _evict_bodies(self, user_id, db):
+        """Drop the least recently viewed bodies once the user is over budget"""
+        total = db.query(func.coalesce(func.sum(GmailMessage.body_size), 0)).filter(
+            GmailMessage.user_id == user_id,
+            GmailMessage.body.isnot(None)
+        ).scalar()
+        if total <= self.max_body_bytes_per_user:
+            return
+
+        candidates = db.query(GmailMessage.id, GmailMessage.body_size).filter(
+            GmailMessage.user_id == user_id,
+            GmailMessage.body.isnot(None)
+        ).order_by(GmailMessage.last_accessed_at, GmailMessage.id).all()
+
+        evict_ids = []
+        for row_id, body_size in candidates:
+            if total <= self.max_body_bytes_per_user:
+                break
+            evict_ids.append(row_id)
+            total -= body_size or 0
+
+        db.query(GmailMessage).filter(GmailMessage.id.in_(evict_ids)).update(
+            {GmailMessage.body: None, GmailMessage.body_size: 0}, synchronize_session=False
+        )
+        db.commit()
+        self._count(evicted=len(evict_ids))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_body_bytes_per_user": self.max_body_bytes_per_user,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "writes": self.writes,
+                "evicted_bodies": self.evicted_bodies
+            }
+
+
+# Global message store instance
+gmail_message_store = GmailMessageStore(
+    max_body_bytes_per_user=int(os.getenv("GMAIL_STORE_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+)
+metrics_registry.register("gmail_message_store", gmail_message_store.stats)
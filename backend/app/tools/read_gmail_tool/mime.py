@@ -0,0 +1,147 @@
+# backend/app/tools/read_gmail_tool/mime.py
+"""
+Body extraction for Gmail API message payloads.
+
+The payload is walked once, iteratively, so bodies nested in
+multipart/alternative inside multipart/mixed (or deeper) are found. Only
+the part that is chosen gets decoded: text/plain is preferred, HTML is
+converted to text as a fallback, and attachments are skipped. Decoding
+honours the part's charset and stops at a size cap, so a huge message
+body is never fully decoded just to be truncated afterwards.
+"""
+import base64
+import binascii
+import os
+import re
+from html import unescape
+from typing import Any, Dict, List, Optional
+
+MAX_BODY_BYTES = int(os.getenv("GMAIL_MAX_BODY_BYTES", str(256 * 1024)))
+
+NO_CONTENT = "No content available"
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+_INLINE_SPACE_RE = re.compile(r'[ \t\r\f\v\xa0]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n+')
+
+# Tags that start a new line in the text, and those that also end a paragraph
+_BLOCK_TAGS = {
+    'br', 'p', 'div', 'tr', 'li', 'ul', 'ol', 'table', 'blockquote', 'pre', 'hr',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'header', 'footer'
+}
+_PARAGRAPH_TAGS = {'p', 'ul', 'ol', 'table', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# One token per match: comment, non-text element (skipped with its content),
+# tag, declaration, text, or a stray "<". Every branch also accepts running
+# to the end of input, so unterminated markup never causes a rescan and the
+# conversion stays linear in the size of the HTML.
+_HTML_TOKEN_RE = re.compile(
+    r'<!--.*?(?:-->|\Z)'
+    r'|<(script|style|title|noscript|template)\b.*?(?:</\1\s*>|\Z)'
+    r'|<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*(?:>|\Z)'
+    r'|<[!?][^>]*(?:>|\Z)'
+    r'|[^<]+'
+    r'|<',
+    re.DOTALL | re.IGNORECASE
+)
+
+
+def _header(part: Dict[str, Any], name: str) -> str:
+    name = name.lower()
+    for header in part.get('headers', []):
+        if header.get('name', '').lower() == name:
+            return header.get('value', '')
+    return ''
+
+
+def _is_attachment(part: Dict[str, Any]) -> bool:
+    if part.get('filename'):
+        return True
+    return _header(part, 'Content-Disposition').lower().startswith('attachment')
+
+
+def _find_body_parts(payload: Dict[str, Any]):
+    """First inline text/plain and text/html parts with data, in document order"""
+    plain = html = None
+    stack: List[Dict[str, Any]] = [payload]
+    while stack:
+        part = stack.pop()
+        mime_type = part.get('mimeType', '').lower()
+        children = part.get('parts')
+        if children:
+            # Reversed so parts pop in their original order
+            stack.extend(reversed(children))
+            continue
+        if _is_attachment(part) or 'data' not in part.get('body', {}):
+            continue
+        if mime_type == 'text/plain':
+            plain = part
+            break
+        if mime_type == 'text/html' and html is None:
+            html = part
+        elif not mime_type and part is payload:
+            # Single-part messages without a type are treated as plain text
+            plain = part
+    return plain, html
+
+
+def decode_part(part: Dict[str, Any], max_bytes: int = MAX_BODY_BYTES) -> str:
+    """Decode a part's base64url data in its charset, reading at most max_bytes"""
+    data = part['body']['data']
+    # 4 base64 characters carry 3 bytes, so only the needed prefix is decoded
+    max_chars = -(-max_bytes // 3) * 4
+    truncated = len(data) > max_chars
+    if truncated:
+        data = data[:max_chars]
+    data += '=' * (-len(data) % 4)
+
+    try:
+        raw = base64.urlsafe_b64decode(data)
+    except (binascii.Error, ValueError) as e:
+        print(f"Error decoding message part: {e}")
+        return ''
+    if len(raw) > max_bytes:
+        raw = raw[:max_bytes]
+        truncated = True
+
+    match = _CHARSET_RE.search(_header(part, 'Content-Type'))
+    charset = match.group(1) if match else 'utf-8'
+    try:
+        text = raw.decode(charset, errors='replace')
+    except LookupError:
+        text = raw.decode('utf-8', errors='replace')
+    # A cut can split a multi-byte character; drop it rather than show a replacement
+    return text.rstrip('\ufffd') if truncated else text
+
+
+def html_to_text(html: str) -> str:
+    """Readable text from HTML in one linear pass (tags dropped, entities decoded)"""
+    chunks: List[str] = []
+    for match in _HTML_TOKEN_RE.finditer(html):
+        token = match.group(0)
+        if match.group(1) or token.startswith(('<!', '<?')):
+            continue
+        if match.group(3):
+            tag = match.group(3).lower()
+            closing = match.group(2) == '/'
+            if tag in (_PARAGRAPH_TAGS if closing else _BLOCK_TAGS):
+                chunks.append('\n')
+            elif tag in ('td', 'th'):
+                chunks.append(' ')
+            continue
+        chunks.append(token)
+
+    text = _INLINE_SPACE_RE.sub(' ', unescape(''.join(chunks)))
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()
+
+
+def extract_body(payload: Dict[str, Any], max_bytes: int = MAX_BODY_BYTES) -> str:
+    """The message body as text, preferring text/plain over HTML"""
+    plain, html = _find_body_parts(payload)
+    body: Optional[str] = None
+    if plain is not None:
+        body = decode_part(plain, max_bytes)
+    if not body and html is not None:
+        body = html_to_text(decode_part(html, max_bytes))
+    return body if body else NO_CONTENT
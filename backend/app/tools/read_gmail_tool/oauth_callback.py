@@ -3,6 +3,7 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from app.common.database import get_db
 from .gmail_client import GmailClient
+from .push import gmail_push
 from google_auth_oauthlib.flow import Flow  # Add missing import
 
 router = APIRouter()
@@ -69,6 +70,14 @@ async def oauth_callback(
         # Store the token in database
         client.store_oauth_token(user_id, credentials, db)
         
+        # Event-driven inbox updates when Gmail push is configured (best effort)
+        if gmail_push.enabled:
+            try:
+                client.authenticate(int(user_id), db)
+                gmail_push.register_watch(client, int(user_id), db)
+            except Exception as e:
+                print(f"Error registering Gmail watch for user {user_id}: {e}")
+        
         # Return success page
         html_content = """
         <html>
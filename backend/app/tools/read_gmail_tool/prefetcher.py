@@ -0,0 +1,192 @@
+# backend/app/tools/read_gmail_tool/prefetcher.py
+"""
+Background inbox prefetch and stale-while-revalidate for the chat read path.
+
+"Check my email" in the chat used to run the whole Gmail sync inside the
+request. The chat now answers from the synced inbox when it is recent
+enough and asks the prefetcher to revalidate it in the background. When
+GMAIL_PREFETCH_ENABLED is set, an asyncio task also keeps the inbox of
+recently active users (activity comes from get_current_user) warm, so the
+first read is usually served from memory as well. Users with a Gmail push
+watch are synced when a notification arrives instead of being polled, but
+their cached inbox is still only served for GMAIL_INBOX_MAX_STALE seconds.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.common.activity import user_activity
+from app.common.database import SessionLocal
+from app.common.executor import run_blocking
+from app.common.metrics import metrics_registry
+from .gmail_client import GmailClient
+from .push import gmail_push
+from .sync_engine import gmail_sync_engine
+
+
+class InboxPrefetcher:
+    def __init__(self, enabled: bool = False, interval: int = 60, active_window: int = 900,
+                 refresh_age: int = 60, max_stale: int = 300, inbox_size: int = 10,
+                 max_users_per_cycle: int = 50):
+        self.enabled = enabled
+        self.interval = interval
+        # Users seen within active_window are prefetched once their inbox is refresh_age old
+        self.active_window = active_window
+        self.refresh_age = refresh_age
+        # Older cached inboxes are not served, even for push-watched users in
+        # case notifications stop arriving; the chat syncs in the request instead
+        self.max_stale = max_stale
+        self.inbox_size = inbox_size
+        self.max_users_per_cycle = max_users_per_cycle
+
+        self._task: Optional[asyncio.Task] = None
+        # Only touched on the event loop, so no lock is needed
+        self._in_flight: Set[int] = set()
+        # Users whose inbox changed while their sync was running; synced again after it
+        self._dirty: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._skip_until: Dict[int, float] = {}
+
+        self.cycles = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.followup_syncs = 0
+        self.served_cached = 0
+        self.cache_misses = 0
+
+    def cached_inbox(self, user_id: int, max_results: int) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """Synced inbox and its age in seconds when it may be served, else None"""
+        cached = gmail_sync_engine.peek_inbox(user_id, max_results)
+        if cached is None or cached[1] > self.max_stale:
+            self.cache_misses += 1
+            return None
+        self.served_cached += 1
+        return cached
+
+    def revalidate(self, user_id: int, force: bool = False) -> bool:
+        """
+        Schedule a background sync of the user's inbox; call from the event
+        loop. Returns True when a sync was started. Users with a push watch
+        are only synced when forced (a notification arrived); a forced
+        revalidate during a running sync queues another one after it, since
+        the running sync may have missed the change.
+        """
+        if user_id in self._in_flight:
+            if force:
+                self._dirty.add(user_id)
+            return False
+        if not force and gmail_push.is_watched(user_id):
+            return False
+        self._in_flight.add(user_id)
+        task = asyncio.get_running_loop().create_task(self._refresh(user_id))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    def _sync_inbox(self, user_id: int) -> bool:
+        """Blocking: sync the inbox if the user has authorized Gmail"""
+        db = SessionLocal()
+        try:
+            client = GmailClient()
+            # Never start an interactive OAuth flow from the background
+            if not client.has_stored_credentials(user_id, db):
+                return False
+            client.authenticate(user_id, db)
+            gmail_sync_engine.get_inbox(client, user_id, self.inbox_size)
+            try:
+                gmail_push.ensure_watch(client, user_id, db)
+            except Exception as e:
+                # Polling keeps working without push
+                print(f"Error registering Gmail watch for user {user_id}: {e}")
+            return True
+        finally:
+            db.close()
+
+    async def _refresh(self, user_id: int):
+        try:
+            if await run_blocking("gmail", self._sync_inbox, user_id):
+                self.refreshes += 1
+            else:
+                self._skip_until[user_id] = time.time() + self.active_window
+        except HTTPException as e:
+            # Re-authentication needed; wait for the user to fix it
+            print(f"Inbox prefetch skipped for user {user_id}: {e.detail}")
+            self._skip_until[user_id] = time.time() + self.active_window
+            self.refresh_failures += 1
+        except Exception as e:
+            print(f"Inbox prefetch failed for user {user_id}: {e}")
+            self.refresh_failures += 1
+        finally:
+            self._in_flight.discard(user_id)
+            if user_id in self._dirty:
+                self._dirty.discard(user_id)
+                self.followup_syncs += 1
+                self.revalidate(user_id, force=True)
+
+    async def prefetch_active_users(self):
+        """One prefetch cycle over recently active users"""
+        now = time.time()
+        for user_id in user_activity.active_users(self.active_window)[:self.max_users_per_cycle]:
+            if self._skip_until.get(user_id, 0) > now:
+                continue
+            cached = gmail_sync_engine.peek_inbox(user_id, self.inbox_size)
+            if cached is not None and cached[1] < self.refresh_age:
+                continue
+            # Push keeps a watched inbox current; refresh it only before it would stop being served
+            watched = gmail_push.is_watched(user_id)
+            if watched and cached is not None and cached[1] < self.max_stale - self.refresh_age:
+                continue
+            self.revalidate(user_id, force=watched)
+        self.cycles += 1
+
+    async def _run(self):
+        while True:
+            try:
+                await self.prefetch_active_users()
+            except Exception as e:
+                print(f"Inbox prefetch cycle failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the prefetch loop on the running event loop (if enabled)"""
+        if self.enabled and self._task is None:
+            print(f"Starting Gmail inbox prefetcher (every {self.interval}s)")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "cycles": self.cycles,
+            "in_flight": len(self._in_flight),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "followup_syncs": self.followup_syncs,
+            "served_cached": self.served_cached,
+            "cache_misses": self.cache_misses
+        }
+
+
+# Global prefetcher instance
+inbox_prefetcher = InboxPrefetcher(
+    enabled=os.getenv("GMAIL_PREFETCH_ENABLED", "false").lower() == "true",
+    interval=int(os.getenv("GMAIL_PREFETCH_INTERVAL", "60")),
+    active_window=int(os.getenv("GMAIL_PREFETCH_ACTIVE_WINDOW", "900")),
+    refresh_age=int(os.getenv("GMAIL_PREFETCH_REFRESH_AGE", "60")),
+    max_stale=int(os.getenv("GMAIL_INBOX_MAX_STALE", "300")),
+    inbox_size=int(os.getenv("GMAIL_PREFETCH_INBOX_SIZE", "10"))
+)
+metrics_registry.register("gmail_prefetch", inbox_prefetcher.stats)
@@ -0,0 +1,224 @@
+# backend/app/tools/read_gmail_tool/push.py
+"""
+Gmail push notifications (users.watch + Cloud Pub/Sub).
+
+When GMAIL_PUBSUB_TOPIC is set, each user's mailbox is registered with
+users.watch so Gmail publishes a notification (mailbox address and new
+historyId) to the topic whenever the inbox changes. A Pub/Sub push
+subscription delivers it to POST /email-tools/gmail/push, which schedules
+an incremental sync of that user's mirrored inbox. Watched users are then
+no longer revalidated on every read: the cached inbox stays current from
+the notifications, which saves the polling history calls.
+
+Watches are stored in gmail_watches, which maps a notification's mailbox
+address back to its user; each worker loads the live ones on startup and
+looks up any mailbox it has not seen in the table. Watches expire after
+about a week. They are renewed from background syncs once they are close
+to expiring, and a user whose watch has lapsed falls back to polling until
+it is renewed. The push endpoint is authenticated with a shared token
+(GMAIL_PUSH_TOKEN) in the subscription's push URL.
+"""
+import base64
+import binascii
+import json
+import os
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.common.database import SessionLocal
+from app.common.metrics import metrics_registry
+from app.common.models import GmailWatch
+
+
+class GmailPushHandler:
+    def __init__(self, topic_name: Optional[str] = None, verification_token: Optional[str] = None,
+                 renew_before: int = 86400):
+        self.topic_name = topic_name
+        self.verification_token = verification_token
+        # Renew watches that expire within this many seconds
+        self.renew_before = renew_before
+
+        # user_id -> (mailbox address, expiry epoch seconds), and the reverse lookup
+        self._watches: Dict[int, Tuple[str, float]] = {}
+        self._users_by_email: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.registrations = 0
+        self.notifications = 0
+        self.syncs_scheduled = 0
+        self.syncs_queued = 0
+        self.duplicates = 0
+        self.unknown_mailboxes = 0
+        self.invalid_messages = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.topic_name)
+
+    def verify_token(self, token: Optional[str]) -> bool:
+        """Check the token from the push URL against GMAIL_PUSH_TOKEN"""
+        if not self.verification_token or not token:
+            return False
+        return secrets.compare_digest(token, self.verification_token)
+
+    def _remember(self, user_id: int, email_address: str, expiration: datetime):
+        with self._lock:
+            self._watches[user_id] = (email_address, (expiration - datetime.utcnow()).total_seconds() + time.time())
+            self._users_by_email[email_address.lower()] = user_id
+
+    def load_watches(self):
+        """Load the stored, unexpired watches (call on startup)"""
+        db = SessionLocal()
+        try:
+            watches = db.query(GmailWatch).filter(
+                GmailWatch.topic_name == self.topic_name,
+                GmailWatch.expiration > datetime.utcnow()
+            ).all()
+            for watch in watches:
+                self._remember(watch.user_id, watch.email_address, watch.expiration)
+            if watches:
+                print(f"Loaded {len(watches)} Gmail watches")
+        except Exception as e:
+            print(f"Error loading Gmail watches: {e}")
+        finally:
+            db.close()
+
+    def forget(self, user_id: int, db: Session = None):
+        """Drop a user's watch (e.g. their Gmail tokens were cleared)"""
+        user_id = int(user_id)
+        with self._lock:
+            watch = self._watches.pop(user_id, None)
+            if watch:
+                self._users_by_email.pop(watch[0].lower(), None)
+        if db is not None:
+            db.query(GmailWatch).filter(GmailWatch.user_id == user_id).delete()
+            db.commit()
+
+    def is_watched(self, user_id: int) -> bool:
+        """
+        True while changes for the user arrive by push. A watch that is due
+        for renewal counts as lapsed, so polling resumes and its background
+        sync renews it.
+        """
+        with self._lock:
+            watch = self._watches.get(user_id)
+            return watch is not None and watch[1] - self.renew_before > time.time()
+
+    def register_watch(self, gmail_client, user_id: int, db: Session) -> Dict[str, Any]:
+        """Register (or renew) the watch for an authenticated GmailClient"""
+        if not self.enabled:
+            return {"success": False, "message": "Gmail push notifications are not configured (GMAIL_PUBSUB_TOPIC)"}
+
+        response = gmail_client.watch_inbox(self.topic_name)
+        # Stored lowercased so notifications match it with an indexed lookup
+        email_address = gmail_client.get_email_address().lower()
+        expiration = datetime.utcfromtimestamp(int(response['expiration']) / 1000)
+
+        watch = db.query(GmailWatch).filter(GmailWatch.user_id == user_id).first()
+        if watch is None:
+            watch = GmailWatch(user_id=user_id)
+            db.add(watch)
+        watch.email_address = email_address
+        watch.topic_name = self.topic_name
+        watch.history_id = str(response.get('historyId'))
+        watch.expiration = expiration
+        db.commit()
+
+        self._remember(user_id, email_address, expiration)
+        with self._lock:
+            self.registrations += 1
+        print(f"Gmail watch registered for user {user_id} until {expiration.isoformat()}")
+        return {
+            "success": True,
+            "message": "Gmail push notifications enabled",
+            "email_address": email_address,
+            "history_id": watch.history_id,
+            "expiration": expiration.isoformat()
+        }
+
+    def ensure_watch(self, gmail_client, user_id: int, db: Session):
+        """Register the watch if the user has none or it is about to expire"""
+        if not self.enabled:
+            return
+        if self.is_watched(user_id):
+            return
+
+        stored = db.query(GmailWatch).filter(GmailWatch.user_id == user_id).first()
+        if (stored is not None and stored.topic_name == self.topic_name
+                and (stored.expiration - datetime.utcnow()).total_seconds() > self.renew_before):
+            self._remember(user_id, stored.email_address, stored.expiration)
+            return
+        self.register_watch(gmail_client, user_id, db)
+
+    def parse_notification(self, envelope: Dict[str, Any]) -> Tuple[str, int]:
+        """
+        (mailbox address, historyId) from a Pub/Sub push envelope:
+        {"message": {"data": base64(JSON {"emailAddress", "historyId"}), ...}, "subscription": ...}
+        Raises ValueError for anything else.
+        """
+        try:
+            data = envelope['message']['data']
+            payload = json.loads(base64.b64decode(data + '=' * (-len(data) % 4), altchars=b'-_'))
+            return payload['emailAddress'], int(payload['historyId'])
+        except (KeyError, TypeError, ValueError, binascii.Error) as e:
+            with self._lock:
+                self.invalid_messages += 1
+            raise ValueError(f"Invalid Gmail push message: {e}")
+
+    def user_for_mailbox(self, email_address: str, db: Session) -> Optional[int]:
+        """The user watching a mailbox that sent a notification, or None"""
+        with self._lock:
+            self.notifications += 1
+            user_id = self._users_by_email.get(email_address.lower())
+
+        if user_id is None:
+            watch = db.query(GmailWatch).filter(GmailWatch.email_address == email_address.lower()).first()
+            if watch is None:
+                with self._lock:
+                    self.unknown_mailboxes += 1
+                return None
+            user_id = watch.user_id
+            self._remember(user_id, watch.email_address, watch.expiration)
+        return user_id
+
+    def record_sync(self, outcome: str):
+        """
+        Count what a notification led to: "scheduled" (a sync started),
+        "queued" (a sync was running; another follows it) or "duplicate"
+        (already applied)
+        """
+        with self._lock:
+            if outcome == "scheduled":
+                self.syncs_scheduled += 1
+            elif outcome == "queued":
+                self.syncs_queued += 1
+            else:
+                self.duplicates += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "watched_users": sum(1 for _, expires_at in self._watches.values() if expires_at > time.time()),
+                "registrations": self.registrations,
+                "notifications": self.notifications,
+                "syncs_scheduled": self.syncs_scheduled,
+                "syncs_queued": self.syncs_queued,
+                "duplicates": self.duplicates,
+                "unknown_mailboxes": self.unknown_mailboxes,
+                "invalid_messages": self.invalid_messages
+            }
+
+
+# Global push handler instance
+gmail_push = GmailPushHandler(
+    topic_name=os.getenv("GMAIL_PUBSUB_TOPIC"),
+    verification_token=os.getenv("GMAIL_PUSH_TOKEN"),
+    renew_before=int(os.getenv("GMAIL_WATCH_RENEW_BEFORE", "86400"))
+)
+metrics_registry.register("gmail_push", gmail_push.stats)
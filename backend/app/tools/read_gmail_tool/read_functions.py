@@ -2,8 +2,32 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.common.models import User
 from .gmail_client import GmailClient
+from .sync_engine import gmail_sync_engine
+from .prefetcher import inbox_prefetcher
 from .schemas import GmailReadResponse, GmailEmail
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+def _format_emails(emails_data: List[Dict[str, Any]]) -> List[GmailEmail]:
+    """Format synced email dicts for responses"""
+    return [GmailEmail(
+        id=email['id'],
+        subject=email['subject'],
+        from_address=email['from'],
+        date=email['date'],
+        snippet=email['snippet'],
+        thread_id=email.get('threadId'),
+        body=email['body']
+    ) for email in emails_data]
+
+def _inbox_result(emails_data: List[Dict[str, Any]], cache_age_seconds: float) -> Dict[str, Any]:
+    formatted_emails = _format_emails(emails_data)
+    return {
+        "success": True,
+        "message": f"Retrieved {len(formatted_emails)} emails from inbox",
+        "emails": formatted_emails,
+        "count": len(formatted_emails),
+        "cache_age_seconds": round(cache_age_seconds, 1)
+    }
 
 def read_gmail_inbox(user_id: int, max_results: int = 10, db: Session = None) -> Dict[str, Any]:
     """Read Gmail inbox for a specific user"""
@@ -21,31 +45,10 @@ def read_gmail_inbox(user_id: int, max_results: int = 10, db: Session = None) ->
         # Authenticate and get service
         service = gmail_client.authenticate(user_id, db)
         
-        # Get inbox emails with full content
-        emails_data = gmail_client.get_inbox_emails(max_results)
-        
-        # Format emails for response
-        formatted_emails = []
-        for email in emails_data:
-            # Get full email body for each message
-            full_body = gmail_client.get_email_body(email['id'])
-            
-            formatted_emails.append(GmailEmail(
-                id=email['id'],
-                subject=email['subject'],
-                from_address=email['from'],
-                date=email['date'],
-                snippet=email['snippet'],
-                thread_id=email.get('threadId'),
-                body=full_body  # Add full body content
-            ))
+        # Get inbox emails with full content, syncing only what changed since the last read
+        emails_data = gmail_sync_engine.get_inbox(gmail_client, user_id, max_results)
         
-        return {
-            "success": True,
-            "message": f"Retrieved {len(formatted_emails)} emails from inbox",
-            "emails": formatted_emails,
-            "count": len(formatted_emails)
-        }
+        return _inbox_result(emails_data, cache_age_seconds=0.0)
         
     except HTTPException as e:
         # Re-raise HTTP exceptions (like auth required)
@@ -58,6 +61,17 @@ def read_gmail_inbox(user_id: int, max_results: int = 10, db: Session = None) ->
             "emails": []
         }
 
+def read_cached_gmail_inbox(user_id: int, max_results: int = 10) -> Optional[Dict[str, Any]]:
+    """
+    The synced inbox from memory, without calling Gmail, or None when nothing
+    recent enough is cached. Callers should revalidate it in the background.
+    """
+    cached = inbox_prefetcher.cached_inbox(user_id, max_results)
+    if cached is None:
+        return None
+    emails_data, cache_age_seconds = cached
+    return _inbox_result(emails_data, cache_age_seconds)
+
 def archive_gmail_email(user_id: int, message_id: str, db: Session = None) -> Dict[str, Any]:
     """Archive a Gmail email for a specific user"""
     try:
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 from app.common.database import get_db
 from app.common.auth import get_current_user
 from app.common.models import User
+from app.common.executor import run_blocking
 # Removed problematic imports - will import inside functions as needed
 
 
@@ -15,6 +16,56 @@ class ArchiveRequest(BaseModel):
 
 router = APIRouter()
 
+def _fetch_inbox(user_id: int, max_results: int, db: Session):
+    """Authenticate and list inbox metadata (blocking Gmail calls)"""
+    # Import here to avoid module-level import issues
+    from app.tools.read_gmail_tool.gmail_client import GmailClient
+    from app.tools.read_gmail_tool.sync_engine import gmail_sync_engine
+    
+    # This will handle both local and production authentication
+    client = GmailClient()
+    service = client.authenticate(user_id, db)
+    
+    # A mirrored inbox is synced incrementally: unchanged, it costs one history call
+    emails = gmail_sync_engine.get_inbox(client, user_id, max_results, mirrored_only=True)
+    if emails is not None:
+        return emails
+    
+    # Otherwise list metadata only; bodies are fetched when an email is opened
+    return client.get_inbox_emails(max_results)
+
+def _fetch_email_body(user_id: int, message_id: str, db: Session):
+    """Authenticate and fetch one email body (blocking Gmail calls)"""
+    # Import here to avoid module-level import issues
+    from app.tools.read_gmail_tool.gmail_client import GmailClient
+    from app.tools.read_gmail_tool.sync_engine import gmail_sync_engine
+    from app.tools.read_gmail_tool.message_store import gmail_message_store
+    
+    # Messages from the synced inbox already carry their body
+    cached = gmail_sync_engine.get_cached_message(user_id, message_id)
+    if cached is not None:
+        return cached['body']
+    
+    # A message fetched before is one indexed read, without authenticating to Gmail
+    stored = gmail_message_store.get_message(user_id, message_id)
+    if stored is not None:
+        return stored['body']
+    
+    client = GmailClient()
+    service = client.authenticate(user_id, db)
+    
+    return client.get_email_body(message_id)
+
+def _register_watch(user_id: int, db: Session):
+    """Authenticate and register the Gmail push watch (blocking Gmail calls)"""
+    from app.tools.read_gmail_tool.gmail_client import GmailClient
+    from app.tools.read_gmail_tool.push import gmail_push
+    
+    client = GmailClient()
+    service = client.authenticate(user_id, db)
+    
+    return gmail_push.register_watch(client, user_id, db)
+
 @router.get("/test-archive")
 async def test_archive_endpoint():
     """Test endpoint to verify archive router is working"""
@@ -29,14 +80,7 @@ async def read_inbox_endpoint(
 ):
     """Read emails from Gmail inbox"""
     try:
-        # Import here to avoid module-level import issues
-        from app.tools.read_gmail_tool.gmail_client import GmailClient
-        
-        # This will handle both local and production authentication
-        client = GmailClient()
-        service = client.authenticate(current_user.id, db)
-        
-        emails = client.get_inbox_emails(max_results)
+        emails = await run_blocking("gmail", _fetch_inbox, current_user.id, max_results, db)
         
         # Format emails for frontend
         formatted_emails = []
@@ -95,17 +139,67 @@ async def get_email_details_endpoint(
 ):
     """Get detailed content of a specific email"""
     try:
-        # Import here to avoid module-level import issues
-        from app.tools.read_gmail_tool.gmail_client import GmailClient
-        
-        client = GmailClient()
-        service = client.authenticate(current_user.id, db)
-        
-        email_body = client.get_email_body(message_id)
+        email_body = await run_blocking("gmail", _fetch_email_body, current_user.id, message_id, db)
         return {
             "success": True,
             "email_body": email_body
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get email details: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get email details: {str(e)}")
+
+@router.post("/gmail/watch")
+async def register_gmail_watch_endpoint(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Enable (or renew) Gmail push notifications for the current user"""
+    try:
+        return await run_blocking("gmail", _register_watch, current_user.id, db)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to register Gmail watch: {str(e)}")
+
+@router.post("/gmail/push")
+async def gmail_push_endpoint(
+    envelope: Dict[str, Any],
+    token: str = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Pub/Sub push endpoint for Gmail notifications - PUBLIC ENDPOINT,
+    authenticated by the token in the subscription's push URL.
+    Any 2xx response acknowledges the message, so messages that can never
+    be processed are acknowledged too instead of being redelivered.
+    """
+    from app.tools.read_gmail_tool.push import gmail_push
+    from app.tools.read_gmail_tool.prefetcher import inbox_prefetcher
+    from app.tools.read_gmail_tool.sync_engine import gmail_sync_engine
+    
+    if not gmail_push.verify_token(token):
+        raise HTTPException(status_code=403, detail="Invalid push token")
+    
+    try:
+        email_address, history_id = gmail_push.parse_notification(envelope)
+    except ValueError as e:
+        print(str(e))
+        return {"success": False, "message": str(e)}
+    
+    user_id = gmail_push.user_for_mailbox(email_address, db)
+    if user_id is None:
+        return {"success": False, "message": "No Gmail watch for this mailbox"}
+    
+    # An inbox that is not mirrored here is fully synced on its next read anyway
+    synced_history_id = gmail_sync_engine.synced_history_id(user_id)
+    if synced_history_id is None:
+        return {"success": True, "message": "Inbox not cached; it will sync on the next read"}
+    if synced_history_id >= history_id:
+        gmail_push.record_sync("duplicate")
+        return {"success": True, "message": "Inbox already up to date"}
+    
+    if inbox_prefetcher.revalidate(user_id, force=True):
+        gmail_push.record_sync("scheduled")
+        return {"success": True, "message": "Inbox sync scheduled"}
+    gmail_push.record_sync("queued")
+    return {"success": True, "message": "Inbox sync in progress; another sync will follow it"}
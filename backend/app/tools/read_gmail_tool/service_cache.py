@@ -0,0 +1,99 @@
+# backend/app/tools/read_gmail_tool/service_cache.py
+"""
+Process-wide cache of Gmail API service objects, one per user.
+
+Building a service through googleapiclient.discovery parses the discovery
+document and sets up the HTTP transport on every call. Caching the built
+service per user lets repeated requests skip that work entirely.
+"""
+import os
+import threading
+
+import httplib2
+from cachetools import TTLCache
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+from app.common.metrics import metrics_registry
+
+
+def _build_gmail_service(credentials):
+    """Build a Gmail service that is safe to share between threads.
+
+    httplib2.Http is not thread-safe, so every thread gets its own
+    authorized transport (which still keeps its connection alive).
+    """
+    local = threading.local()
+
+    def request_builder(http, *args, **kwargs):
+        authorized_http = getattr(local, 'http', None)
+        if authorized_http is None:
+            authorized_http = AuthorizedHttp(credentials, http=httplib2.Http())
+            local.http = authorized_http
+        return HttpRequest(authorized_http, *args, **kwargs)
+
+    return build(
+        'gmail', 'v1',
+        credentials=credentials,
+        requestBuilder=request_builder,
+        static_discovery=True,
+        cache_discovery=False
+    )
+
+
+class GmailServiceCache:
+    def __init__(self, maxsize: int = 256, ttl: int = 1800):
+        # TTLCache evicts least recently used entries once full and drops expired ones
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_service(self, user_id, credentials):
+        """Return the cached service for a user, building it on a miss.
+
+        The entry is tied to the access token it was built with, so a
+        refreshed token transparently causes a rebuild.
+        """
+        key = str(user_id)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == credentials.token:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        service = _build_gmail_service(credentials)
+
+        with self._lock:
+            self._cache[key] = (credentials.token, service)
+        return service
+
+    def invalidate(self, user_id):
+        """Drop the cached service for a user (token refreshed, stored or cleared)"""
+        with self._lock:
+            if self._cache.pop(str(user_id), None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global service cache instance
+gmail_service_cache = GmailServiceCache(
+    maxsize=int(os.getenv("GMAIL_SERVICE_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("GMAIL_SERVICE_CACHE_TTL", "1800"))
+)
+metrics_registry.register("gmail_service_cache", gmail_service_cache.stats)
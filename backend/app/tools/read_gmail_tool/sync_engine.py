@@ -0,0 +1,216 @@
+# backend/app/tools/read_gmail_tool/sync_engine.py
+"""
+Incremental Gmail inbox sync.
+
+Reading the inbox used to list INBOX and download the newest N messages on
+every call (2N+1 API calls, batched). The sync engine keeps each user's
+newest inbox messages in memory together with the mailbox historyId. Later
+reads ask users.history.list for what changed since then and only download
+messages that were added to the inbox, so an unchanged inbox costs one small
+API call. A full resync happens on the first read, when more messages are
+requested than are cached, or when Gmail reports the historyId has expired.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from googleapiclient.errors import HttpError
+
+from app.common.metrics import metrics_registry
+
+INBOX_LABEL = 'INBOX'
+
+
+class _MailboxState:
+    def __init__(self, history_id: str, window: int, capacity: int, complete: bool):
+        self.history_id = history_id
+        # How many messages reads are served from, and how many are mirrored.
+        # The extra capacity absorbs archives/deletes without a full resync.
+        self.window = window
+        self.capacity = capacity
+        # True when the whole inbox fits in the mirror
+        self.complete = complete
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self.synced_at = time.time()
+
+    def newest(self, count: int) -> List[Dict[str, Any]]:
+        ordered = sorted(self.messages.values(), key=lambda email: email['internalDate'], reverse=True)
+        return ordered[:count]
+
+    def trim(self):
+        """Keep only the newest `capacity` messages"""
+        if len(self.messages) > self.capacity:
+            keep = {email['id'] for email in self.newest(self.capacity)}
+            self.messages = {message_id: email for message_id, email in self.messages.items() if message_id in keep}
+            self.complete = False
+
+
+class GmailSyncEngine:
+    def __init__(self, max_users: int = 1024, ttl: int = 86400, max_window: int = 100, buffer: int = 5):
+        self._states = TTLCache(maxsize=max_users, ttl=ttl)
+        self._lock = threading.Lock()
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self.max_window = max_window
+        self.buffer = buffer
+
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.expired_history = 0
+        self.messages_fetched = 0
+
+    def _user_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(key)
+            if lock is None:
+                lock = self._user_locks[key] = threading.Lock()
+            return lock
+
+    def get_inbox(self, gmail_client, user_id, max_results: int = 10,
+                  mirrored_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        Newest inbox messages (with body) for an authenticated GmailClient,
+        synced incrementally where possible. With mirrored_only=True, None is
+        returned instead of running a full sync when the user's mirror does
+        not already cover max_results messages.
+        """
+        key = str(user_id)
+        requested = max(max_results, 1)
+        max_results = min(requested, self.max_window)
+        with self._user_lock(key):
+            with self._lock:
+                state = self._states.get(key)
+
+            if state is None or max_results > state.window:
+                if mirrored_only:
+                    return None
+                state = self._full_sync(gmail_client, max_results)
+            elif mirrored_only and requested > state.window:
+                return None
+            else:
+                try:
+                    state = self._incremental_sync(gmail_client, state)
+                except HttpError as error:
+                    if error.resp.status != 404:
+                        raise
+                    # historyId too old for Gmail to answer; start over
+                    print(f"Gmail history expired for user {user_id}, running full sync")
+                    with self._lock:
+                        self.expired_history += 1
+                    state = self._full_sync(gmail_client, state.window)
+
+            with self._lock:
+                self._states[key] = state
+            return [dict(email) for email in state.newest(max_results)]
+
+    def peek_inbox(self, user_id, max_results: int = 10) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """
+        The newest synced inbox messages and their age in seconds, without
+        calling Gmail. None when the user has not been synced for that many.
+        """
+        with self._lock:
+            state = self._states.get(str(user_id))
+            if state is None or max_results > state.window:
+                return None
+            emails = [dict(email) for email in state.newest(max_results)]
+            return emails, time.time() - state.synced_at
+
+    def synced_history_id(self, user_id) -> Optional[int]:
+        """historyId the user's mirror is synced to, or None when not mirrored"""
+        with self._lock:
+            state = self._states.get(str(user_id))
+            return int(state.history_id) if state else None
+
+    def get_cached_message(self, user_id, message_id: str) -> Optional[Dict[str, Any]]:
+        """A message from the user's synced inbox, if it is cached"""
+        with self._lock:
+            state = self._states.get(str(user_id))
+            email = state.messages.get(message_id) if state else None
+            return dict(email) if email else None
+
+    def reset(self, user_id):
+        """Forget a user's synced inbox (e.g. the Gmail account changed)"""
+        with self._lock:
+            self._states.pop(str(user_id), None)
+
+    def _full_sync(self, gmail_client, window: int) -> _MailboxState:
+        window = min(max(window, 1), self.max_window)
+        capacity = window + self.buffer
+        # Take the historyId first so changes made during the listing are replayed next time
+        history_id = gmail_client.get_history_id()
+        message_ids = gmail_client.list_inbox_message_ids(capacity)
+        emails = gmail_client.get_full_messages(message_ids)
+
+        state = _MailboxState(history_id, window, capacity, complete=len(message_ids) < capacity)
+        state.messages = {email['id']: email for email in emails}
+
+        with self._lock:
+            self.full_syncs += 1
+            self.messages_fetched += len(emails)
+        return state
+
+    def _incremental_sync(self, gmail_client, state: _MailboxState) -> _MailboxState:
+        records, latest_history_id = gmail_client.list_history(state.history_id)
+
+        # Replay the changes in order; the last change to a message wins
+        in_inbox: Dict[str, bool] = {}
+        for record in records:
+            for added in record.get('messagesAdded', []):
+                message = added['message']
+                if INBOX_LABEL in message.get('labelIds', []):
+                    in_inbox[message['id']] = True
+            for deleted in record.get('messagesDeleted', []):
+                in_inbox[deleted['message']['id']] = False
+            for change in record.get('labelsAdded', []):
+                if INBOX_LABEL in change.get('labelIds', []):
+                    in_inbox[change['message']['id']] = True
+            for change in record.get('labelsRemoved', []):
+                if INBOX_LABEL in change.get('labelIds', []):
+                    in_inbox[change['message']['id']] = False
+
+        # Work on a copy so cached reads never see a half-applied sync
+        messages = dict(state.messages)
+        for message_id, present in in_inbox.items():
+            if not present:
+                messages.pop(message_id, None)
+
+        new_ids = [message_id for message_id, present in in_inbox.items()
+                   if present and message_id not in messages]
+        if new_ids:
+            for email in gmail_client.get_full_messages(new_ids):
+                messages[email['id']] = email
+
+        # Removals can leave the mirror short of messages we never downloaded
+        if not state.complete and len(messages) < state.window:
+            return self._full_sync(gmail_client, state.window)
+
+        state.messages = messages
+        state.trim()
+        state.history_id = latest_history_id
+        state.synced_at = time.time()
+
+        with self._lock:
+            self.incremental_syncs += 1
+            self.messages_fetched += len(new_ids)
+        return state
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "synced_users": len(self._states),
+                "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs,
+                "expired_history": self.expired_history,
+                "messages_fetched": self.messages_fetched
+            }
+
+
+# Global sync engine instance
+gmail_sync_engine = GmailSyncEngine(
+    max_users=int(os.getenv("GMAIL_SYNC_MAX_USERS", "1024")),
+    ttl=int(os.getenv("GMAIL_SYNC_STATE_TTL", "86400")),
+    max_window=int(os.getenv("GMAIL_SYNC_MAX_WINDOW", "100")),
+    buffer=int(os.getenv("GMAIL_SYNC_BUFFER", "5"))
+)
+metrics_registry.register("gmail_sync", gmail_sync_engine.stats)
@@ -5,10 +5,11 @@ from pathlib import Path
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from typing import Dict, Any
-from google.auth.transport.requests import Request
+
+from app.tools.read_gmail_tool.service_cache import gmail_service_cache
+from app.tools.read_gmail_tool.credential_cache import gmail_credential_cache
 
 class GmailReplyClient:
     def __init__(self, user_id: str):
@@ -79,31 +80,11 @@ class GmailReplyClient:
     def _get_production_credentials(self) -> Credentials:
         """Get credentials from database for production"""
         try:
-            from app.common.database import get_db
-            from app.tools.read_gmail_tool.gmail_client import GmailClient
-            
-            # Get database session
-            db = next(get_db())
-            
-            # Use the existing GmailClient to get tokens from database
-            gmail_client = GmailClient()
-            credentials = gmail_client.get_oauth_token_from_db(self.user_id, db)
+            # Shared with the read tool; only touches the database on a cache miss or refresh
+            credentials = gmail_credential_cache.get_credentials(self.user_id)
             
             if not credentials:
-                raise Exception(f"No Gmail token found for user {self.user_id}. Please authenticate first.")
-            
-            if not credentials.valid:
-                if credentials.expired and credentials.refresh_token:
-                    try:
-                        credentials.refresh(Request())
-                        # Update the refreshed token in database
-                        gmail_client.store_oauth_token(self.user_id, credentials, db)
-                        print("Token refreshed successfully")
-                    except Exception as e:
-                        print(f"Error refreshing token: {e}")
-                        raise Exception("Token expired and could not be refreshed. Please re-authenticate.")
-                else:
-                    raise Exception("Invalid credentials. Please re-authenticate.")
+                raise Exception(f"No valid Gmail token found for user {self.user_id}. Please authenticate first.")
             
             return credentials
             
@@ -111,9 +92,9 @@ class GmailReplyClient:
             raise Exception(f"Failed to get production credentials: {str(e)}")
     
     def _build_service(self):
-        """Build Gmail service instance"""
+        """Get the (cached) Gmail service instance for this user"""
         creds = self._get_credentials()
-        self.service = build('gmail', 'v1', credentials=creds)
+        self.service = gmail_service_cache.get_service(self.user_id, creds)
     
     def _format_email_body(self, body: str) -> str:
         """Format the email body with proper HTML formatting"""
@@ -5,6 +5,7 @@ from typing import Dict, Any
 from app.common.database import get_db
 from app.common.auth import get_current_user
 from app.common.models import User
+from app.common.executor import run_blocking
 from .reply_functions import send_gmail_reply, create_gmail_reply_draft, format_reply_body, prepare_reply_subject
 from .schemas import ReplyRequest, ReplyDraftRequest, ReplyResponse
 
@@ -18,7 +19,9 @@ async def send_gmail_reply_endpoint(
 ):
     """Send a reply to a Gmail thread"""
     try:
-        result = send_gmail_reply(
+        result = await run_blocking(
+            "gmail",
+            send_gmail_reply,
             user_id=current_user.id,
             thread_id=request.thread_id,
             to_email=request.to_email,
@@ -40,7 +43,9 @@ async def create_gmail_reply_draft_endpoint(
 ):
     """Create a draft reply in Gmail"""
     try:
-        result = create_gmail_reply_draft(
+        result = await run_blocking(
+            "gmail",
+            create_gmail_reply_draft,
             user_id=current_user.id,
             thread_id=request.thread_id,
             to_email=request.to_email,
@@ -1,34 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.common.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+from app.common.database import get_db, SessionLocal
 from app.common.auth import get_current_user, require_admin
 from app.common.models import User, EmailHistory
+from app.common.pagination import filter_email_history, paginate_email_history, set_next_cursor
 from app.common.schemas import EmailHistoryResponse
-from typing import List
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import csv
+import io
+import json
 
 router = APIRouter()
 
+# Only the columns the admin listing shows, so no ORM entities or lazy loads
+ADMIN_HISTORY_COLUMNS = (
+    EmailHistory.id,
+    EmailHistory.recipient,
+    EmailHistory.subject,
+    EmailHistory.content_preview,
+    EmailHistory.email_id,
+    EmailHistory.status,
+    EmailHistory.created_at,
+    User.email.label("user_email")
+)
+
+def admin_history_query(db: Session, recipient: Optional[str] = None, status: Optional[str] = None,
+                        date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                        user_email: Optional[str] = None) -> Query:
+    """Single joined query over history rows and their sender's email"""
+    query = db.query(*ADMIN_HISTORY_COLUMNS).join(User, EmailHistory.user_id == User.id)
+    if user_email:
+        query = query.filter(User.email == user_email)
+    return filter_email_history(query, recipient, status, date_from, date_to)
+
+def iter_admin_history(recipient: Optional[str] = None, status: Optional[str] = None,
+                       date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                       user_email: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every matching history row, newest first, from a server-side
+    cursor in batches, so memory stays flat however many rows match.
+    Opens its own session because it runs after the request's session closes.
+    """
+    db = SessionLocal()
+    try:
+        query = admin_history_query(db, recipient, status, date_from, date_to, user_email).order_by(
+            EmailHistory.created_at.desc(), EmailHistory.id.desc()
+        )
+        for row in query.execution_options(stream_results=True).yield_per(batch_size):
+            yield dict(row._mapping)
+    finally:
+        db.close()
+
+def _json_array_stream(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    yield "["
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + json.dumps(jsonable_encoder(row))
+    yield "]"
+
+def _ndjson_stream(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(jsonable_encoder(row)) + "\n"
+
+def _csv_stream(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in ADMIN_HISTORY_COLUMNS])
+    for row in rows:
+        writer.writerow(row.values())
+        # Flush the buffer in chunks rather than per row
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+EXPORT_FORMATS = {
+    "ndjson": (_ndjson_stream, "application/x-ndjson"),
+    "csv": (_csv_stream, "text/csv")
+}
+
+@router.get("/admin/history/export")
+async def export_email_history(
+    format: str = "ndjson",
+    recipient: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    user_email: Optional[str] = None,
+    admin: User = Depends(require_admin)
+):
+    """Stream all matching email history as NDJSON or CSV"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Use ndjson or csv")
+    
+    stream_rows, media_type = EXPORT_FORMATS[format]
+    rows = iter_admin_history(recipient, status, date_from, date_to, user_email)
+    return StreamingResponse(
+        stream_rows(rows),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=email_history.{format}"}
+    )
+
 @router.get("/admin/history", response_model=List[EmailHistoryResponse])
 async def get_email_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    recipient: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    stream: bool = False,
     db: Session = Depends(get_db),
     admin: User = Depends(require_admin)
 ):
-    email_history = db.query(EmailHistory).join(User).order_by(EmailHistory.created_at.desc()).all()
-    
-    response = []
-    for email in email_history:
-        response.append(EmailHistoryResponse(
-            id=email.id,
-            recipient=email.recipient,
-            subject=email.subject,
-            content_preview=email.content_preview,
-            email_id=email.email_id,
-            status=email.status,
-            created_at=email.created_at,
-            user_email=email.user.email
-        ))
+    """
+    One page of all users' email history. With stream=true every matching
+    row is streamed as a JSON array instead, without building it in memory.
+    """
+    if stream:
+        return StreamingResponse(
+            _json_array_stream(iter_admin_history(recipient, status, date_from, date_to)),
+            media_type="application/json"
+        )
     
-    return response
+    query = admin_history_query(db, recipient, status, date_from, date_to)
+    email_history, next_cursor = paginate_email_history(query, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return [dict(row._mapping) for row in email_history]
 
 @router.get("/email-content/{email_id}")
 async def get_email_content(
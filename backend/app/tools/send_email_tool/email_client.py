@@ -1,11 +1,15 @@
 # backend/app/email_client.py
 import os
+import threading
+import time
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 from ...common.database import get_db
 from ...common.models import EmailHistory
+from ...common.metrics import metrics_registry
 
 # Load environment variables from root directory
 root_dir = Path(__file__).parent.parent.parent
@@ -13,6 +17,9 @@ env_path = root_dir / ".env"
 load_dotenv(dotenv_path=str(env_path))
 
 class EmailClient:
+    # Resend accepts at most 100 emails per batch request
+    BATCH_SIZE = 100
+
     def __init__(self):
         self.resend_api_key = os.getenv("RESEND_API_KEY")
         print(f"Resend API Key: {self.resend_api_key[:10]}...")  # Print first 10 chars for verification
@@ -25,11 +32,57 @@ class EmailClient:
             print("Resend API Key found and loaded successfully")
             
         self.enabled = True
-        self.base_url = "https://api.resend.com"
+        self.base_url = os.getenv("RESEND_BASE_URL", "https://api.resend.com")
         self.headers = {
             "Authorization": f"Bearer {self.resend_api_key}",
             "Content-Type": "application/json"
         }
+        
+        # Separate connect and read timeouts: fail fast on connect, allow a slow API response
+        self.timeout = (
+            float(os.getenv("RESEND_CONNECT_TIMEOUT", "5")),
+            float(os.getenv("RESEND_READ_TIMEOUT", "30"))
+        )
+        
+        # Persistent keep-alive session so sends reuse the TCP+TLS connection
+        pool_size = int(os.getenv("RESEND_POOL_SIZE", "10"))
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.total_send_seconds = 0.0
+        metrics_registry.register("resend_client", self.stats)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Send counts and connection reuse, read from the urllib3 connection pools"""
+        connections_opened = 0
+        for pool_key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(pool_key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+        with self._stats_lock:
+            requests_sent = self.requests_sent
+            total_send_seconds = self.total_send_seconds
+        return {
+            "requests_sent": requests_sent,
+            "connections_opened": connections_opened,
+            "connections_reused": max(requests_sent - connections_opened, 0),
+            "avg_send_seconds": round(total_send_seconds / requests_sent, 4) if requests_sent else 0.0
+        }
+    
+    def _post(self, path: str, payload: Any) -> requests.Response:
+        """POST to the Resend API over the pooled session"""
+        started = time.perf_counter()
+        try:
+            return self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        finally:
+            with self._stats_lock:
+                self.requests_sent += 1
+                self.total_send_seconds += time.perf_counter() - started
     
     def send_email(
         self, 
@@ -62,12 +115,7 @@ class EmailClient:
             }
             
             # Send the email via Resend API
-            response = requests.post(
-                f"{self.base_url}/emails",
-                headers=self.headers,
-                json=email_data,
-                timeout=30
-            )
+            response = self._post("/emails", email_data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -105,6 +153,68 @@ class EmailClient:
                 "error": str(e)
             }
     
+    def send_batch(
+        self,
+        emails: List[Dict[str, str]],
+        from_email: Optional[str] = None,
+        from_name: Optional[str] = "AI Assistant"
+    ) -> List[Dict[str, Any]]:
+        """
+        Send many emails through Resend's batch endpoint.
+        
+        Each item needs to_email, subject and html_content. Returns one result
+        per item, in order, with the same keys send_email returns.
+        """
+        if not self.enabled:
+            return [{
+                "success": False,
+                "message": "Email service is not configured. Please set RESEND_API_KEY environment variable."
+            } for _ in emails]
+        
+        if not from_email:
+            from_email = os.getenv("DEFAULT_FROM_EMAIL", "onboarding@resend.dev")
+        
+        results = []
+        for start in range(0, len(emails), self.BATCH_SIZE):
+            chunk = emails[start:start + self.BATCH_SIZE]
+            payload = [{
+                "from": f"{from_name} <{from_email}>",
+                "to": [email["to_email"]],
+                "subject": email["subject"],
+                "html": email["html_content"]
+            } for email in chunk]
+            
+            try:
+                response = self._post("/emails/batch", payload)
+                
+                if response.status_code == 200:
+                    sent = response.json().get("data", [])
+                    for i in range(len(chunk)):
+                        email_id = sent[i].get("id") if i < len(sent) else None
+                        results.append({
+                            "success": True,
+                            "message": "Email sent successfully",
+                            "email_id": email_id
+                        })
+                else:
+                    error_data = response.json() if response.content else {}
+                    error_msg = f"Failed to send email: {error_data.get('message', 'Unknown error')}"
+                    results.extend({
+                        "success": False,
+                        "message": error_msg,
+                        "status_code": response.status_code,
+                        "error": error_data
+                    } for _ in chunk)
+                    
+            except requests.exceptions.RequestException as e:
+                results.extend({
+                    "success": False,
+                    "message": f"Network error: {str(e)}",
+                    "error": str(e)
+                } for _ in chunk)
+        
+        return results
+    
     def validate_email_address(self, email: str) -> bool:
         """
         Basic email validation
@@ -0,0 +1,164 @@
+# backend/app/tools/send_email_tool/outbox.py
+"""
+Durable sending of queued emails.
+
+Large batches are stored as "queued" email history rows and answered right
+away. The rows are the queue: a drain claims up to one Resend batch of them
+with a single UPDATE ... RETURNING (status "sending", claimed_at set), sends
+them and records "sent" or "failed" on each row. Only rows still "queued"
+can be claimed, so concurrent drains in several workers never send the same
+email. The request that queued a batch drains it as a background task, and
+every worker also drains on startup and every EMAIL_QUEUE_DRAIN_INTERVAL
+seconds, which picks up rows left behind by a restart.
+
+A row stuck in "sending" means its worker died while Resend had it; whether
+the email went out is unknown, so after EMAIL_QUEUE_SENDING_TIMEOUT it is
+marked "failed" rather than sent a second time.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update
+
+from app.common.database import SessionLocal
+from app.common.executor import run_blocking
+from app.common.metrics import metrics_registry
+from app.common.models import EmailHistory
+from .email_client import email_client
+
+
+class EmailOutbox:
+    def __init__(self, enabled: bool = True, interval: int = 60, sending_timeout: int = 600):
+        self.enabled = enabled
+        self.interval = interval
+        self.sending_timeout = sending_timeout
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.drains = 0
+        self.sent = 0
+        self.failed = 0
+        self.abandoned = 0
+
+    def _claim(self, db, history_ids: Optional[List[int]], limit: int) -> List[Any]:
+        """Atomically move up to `limit` queued rows to "sending" and return them"""
+        candidates = select(EmailHistory.id).where(EmailHistory.status == "queued")
+        if history_ids is not None:
+            candidates = candidates.where(EmailHistory.id.in_(history_ids))
+        candidates = candidates.order_by(EmailHistory.id).limit(limit)
+        if db.get_bind().dialect.name == "postgresql":
+            # Skip rows another worker is claiming instead of waiting for it
+            candidates = candidates.with_for_update(skip_locked=True)
+
+        claimed = db.execute(
+            update(EmailHistory)
+            .where(EmailHistory.id.in_(candidates), EmailHistory.status == "queued")
+            .values(status="sending", claimed_at=datetime.utcnow())
+            .returning(EmailHistory.id, EmailHistory.recipient, EmailHistory.subject,
+                       EmailHistory.full_content_html)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return sorted(claimed, key=lambda row: row.id)
+
+    def _record(self, db, claimed: List[Any], send_results: List[Dict[str, Any]]):
+        """Store each claimed row's outcome with one executemany UPDATE"""
+        outcomes = []
+        for row, result in zip(claimed, send_results):
+            if result["success"]:
+                outcomes.append({"id": row.id, "status": "sent", "email_id": result.get("email_id")})
+            else:
+                outcomes.append({"id": row.id, "status": "failed", "email_id": None})
+                print(f"Queued email {row.id} to {row.recipient} failed: {result['message']}")
+        db.execute(update(EmailHistory), outcomes)
+        db.commit()
+
+        sent = sum(1 for outcome in outcomes if outcome["status"] == "sent")
+        self.sent += sent
+        self.failed += len(outcomes) - sent
+
+    def _abandon_stale_claims(self, db):
+        """Fail rows whose sending worker died mid-send"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.sending_timeout)
+        abandoned = db.execute(
+            update(EmailHistory)
+            .where(EmailHistory.status == "sending", EmailHistory.claimed_at < cutoff)
+            .values(status="failed")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if abandoned:
+            print(f"Marked {abandoned} emails stuck in sending as failed")
+            self.abandoned += abandoned
+
+    async def drain(self, history_ids: Optional[List[int]] = None) -> int:
+        """
+        Send queued emails (only `history_ids` when given) one Resend batch
+        at a time and return how many were processed.
+        """
+        db = SessionLocal()
+        processed = 0
+        try:
+            if history_ids is None:
+                self._abandon_stale_claims(db)
+            while True:
+                claimed = self._claim(db, history_ids, email_client.BATCH_SIZE)
+                if not claimed:
+                    break
+                send_results = await run_blocking("resend", email_client.send_batch, [{
+                    "to_email": row.recipient,
+                    "subject": row.subject,
+                    "html_content": row.full_content_html
+                } for row in claimed])
+                self._record(db, claimed, send_results)
+                processed += len(claimed)
+            if processed:
+                print(f"Processed {processed} queued emails")
+        except Exception as e:
+            db.rollback()
+            print(f"Error sending queued emails: {str(e)}")
+        finally:
+            db.close()
+            self.drains += 1
+        return processed
+
+    async def _run(self):
+        while True:
+            await self.drain()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Drain now and then periodically on the running event loop (if enabled)"""
+        if self.enabled and self._task is None:
+            print(f"Starting queued email drain (every {self.interval}s)")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "drains": self.drains,
+            "sent": self.sent,
+            "failed": self.failed,
+            "abandoned": self.abandoned
+        }
+
+
+# Global outbox instance
+email_outbox = EmailOutbox(
+    enabled=os.getenv("EMAIL_QUEUE_DRAIN_ENABLED", "true").lower() == "true",
+    interval=int(os.getenv("EMAIL_QUEUE_DRAIN_INTERVAL", "60")),
+    sending_timeout=int(os.getenv("EMAIL_QUEUE_SENDING_TIMEOUT", "600"))
+)
+metrics_registry.register("email_outbox", email_outbox.stats)
@@ -1,20 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.common.database import get_db
 from app.common.auth import get_current_user
 from app.common.models import User, EmailHistory
+from app.common.executor import run_blocking
 from .email_client import email_client
+from .outbox import email_outbox
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 router = APIRouter()
 
+# Batches larger than this are queued and sent in the background
+BATCH_BACKGROUND_THRESHOLD = int(os.getenv("EMAIL_BATCH_BACKGROUND_THRESHOLD", "50"))
+
 class EmailComposition(BaseModel):
     recipient: str
     subject: str
     body: str
     composition_id: Optional[str] = None
 
+class BatchEmailRequest(BaseModel):
+    emails: List[EmailComposition]
+    background: bool = False
+
+def _content_preview(body: str) -> str:
+    return body[:100] + "..." if len(body) > 100 else body
+
 @router.post("/approve-and-send")
 async def approve_and_send_email(
     email_data: EmailComposition,
@@ -26,7 +39,9 @@ async def approve_and_send_email(
         print(f"Email data: {email_data}")
         
         html_content = email_client.format_email_html(email_data.body)
-        result = email_client.send_email(
+        result = await run_blocking(
+            "resend",
+            email_client.send_email,
             to_email=email_data.recipient,
             subject=email_data.subject,
             html_content=html_content
@@ -37,7 +52,7 @@ async def approve_and_send_email(
                 user_id=current_user.id,
                 recipient=email_data.recipient,
                 subject=email_data.subject,
-                content_preview=email_data.body[:100] + "..." if len(email_data.body) > 100 else email_data.body,
+                content_preview=_content_preview(email_data.body),
                 full_content_html=html_content,
                 email_id=result.get("email_id"),
                 status="sent"
@@ -56,6 +71,107 @@ async def approve_and_send_email(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/approve-and-send/batch")
+async def approve_and_send_email_batch(
+    batch: BatchEmailRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Approve and send many compositions at once.
+    
+    Small batches are sent synchronously through Resend's batch endpoint.
+    Large batches (or background=true) are stored as "queued" history rows
+    and sent by the email outbox in the background, so the request returns
+    immediately.
+    """
+    try:
+        print(f"Batch approve and send request from user: {current_user.email} ({len(batch.emails)} emails)")
+        
+        html_contents = [email_client.format_email_html(email.body) for email in batch.emails]
+        
+        if batch.background or len(batch.emails) > BATCH_BACKGROUND_THRESHOLD:
+            # Persist the queue first; the periodic drain sends anything a restart interrupts
+            queued_rows = [
+                EmailHistory(
+                    user_id=current_user.id,
+                    recipient=email.recipient,
+                    subject=email.subject,
+                    content_preview=_content_preview(email.body),
+                    full_content_html=html_content,
+                    status="queued"
+                )
+                for email, html_content in zip(batch.emails, html_contents)
+            ]
+            db.add_all(queued_rows)
+            db.commit()
+            
+            history_ids = [row.id for row in queued_rows]
+            background_tasks.add_task(email_outbox.drain, history_ids)
+            
+            return {
+                "success": True,
+                "queued": True,
+                "message": f"Queued {len(history_ids)} emails for sending",
+                "results": [{
+                    "recipient": email.recipient,
+                    "composition_id": email.composition_id,
+                    "status": "queued",
+                    "email_id": history_id
+                } for email, history_id in zip(batch.emails, history_ids)]
+            }
+        
+        send_results = await run_blocking("resend", email_client.send_batch, [{
+            "to_email": email.recipient,
+            "subject": email.subject,
+            "html_content": html_content
+        } for email, html_content in zip(batch.emails, html_contents)])
+        
+        # One bulk insert for every email that was sent
+        sent_rows = {}
+        for index, (email, html_content, result) in enumerate(zip(batch.emails, html_contents, send_results)):
+            if result["success"]:
+                sent_rows[index] = EmailHistory(
+                    user_id=current_user.id,
+                    recipient=email.recipient,
+                    subject=email.subject,
+                    content_preview=_content_preview(email.body),
+                    full_content_html=html_content,
+                    email_id=result.get("email_id"),
+                    status="sent"
+                )
+        if sent_rows:
+            db.add_all(sent_rows.values())
+            db.commit()
+        
+        results = []
+        for index, (email, result) in enumerate(zip(batch.emails, send_results)):
+            if index in sent_rows:
+                results.append({
+                    "recipient": email.recipient,
+                    "composition_id": email.composition_id,
+                    "status": "sent",
+                    "email_id": sent_rows[index].id
+                })
+            else:
+                results.append({
+                    "recipient": email.recipient,
+                    "composition_id": email.composition_id,
+                    "status": "failed",
+                    "message": result["message"]
+                })
+        
+        return {
+            "success": len(sent_rows) == len(batch.emails),
+            "queued": False,
+            "message": f"Sent {len(sent_rows)} of {len(batch.emails)} emails",
+            "results": results
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/save-draft")
 async def save_email_draft(
     email_data: EmailComposition,
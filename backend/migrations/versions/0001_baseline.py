@@ -0,0 +1,83 @@
+"""Baseline schema
+
+Creates the tables that existed before migrations were introduced. Databases
+that were set up with create_all() or the initialize/ scripts already have
+them, so each table is only created when it is missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing_tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("name", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("is_admin", sa.Boolean()),
+            sa.Column("created_by", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "email_histories" not in existing_tables:
+        op.create_table(
+            "email_histories",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("recipient", sa.String()),
+            sa.Column("subject", sa.String()),
+            sa.Column("content_preview", sa.String()),
+            sa.Column("full_content_html", sa.String()),
+            sa.Column("email_id", sa.String()),
+            sa.Column("status", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_email_histories_id", "email_histories", ["id"])
+
+    if "email_name_maps" not in existing_tables:
+        op.create_table(
+            "email_name_maps",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("name", sa.String()),
+            sa.Column("email_address", sa.String()),
+        )
+        op.create_index("ix_email_name_maps_id", "email_name_maps", ["id"])
+
+    if "oauth_tokens" not in existing_tables:
+        op.create_table(
+            "oauth_tokens",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("service", sa.String(), nullable=False),
+            sa.Column("token_data", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_oauth_tokens_id", "oauth_tokens", ["id"])
+
+
+def downgrade():
+    op.drop_table("oauth_tokens")
+    op.drop_table("email_name_maps")
+    op.drop_table("email_histories")
+    op.drop_table("users")
@@ -0,0 +1,73 @@
+"""Add normalized name_key to email_name_maps
+
+Contact lookups used name ILIKE :name with no usable index. This adds a
+normalized name_key column, backfills it, removes duplicate mappings that
+now share a key (keeping the most recent one) and adds a unique index on
+(user_id, name_key).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.common.utils import normalize_name
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_email_name_maps_user_id_name_key"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    columns = {column["name"] for column in inspector.get_columns("email_name_maps")}
+    if "name_key" not in columns:
+        op.add_column("email_name_maps", sa.Column("name_key", sa.String(), nullable=True))
+
+    email_name_maps = sa.table(
+        "email_name_maps",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("name", sa.String),
+        sa.column("name_key", sa.String),
+    )
+
+    rows = bind.execute(
+        sa.select(email_name_maps.c.id, email_name_maps.c.user_id, email_name_maps.c.name)
+        .order_by(email_name_maps.c.id)
+    ).all()
+
+    # Later rows win, matching how add_name_email_mapping overwrote earlier ones
+    keep = {}
+    for row in rows:
+        keep[(row.user_id, normalize_name(row.name))] = row.id
+
+    kept_ids = set(keep.values())
+    duplicate_ids = [row.id for row in rows if row.id not in kept_ids]
+    if duplicate_ids:
+        bind.execute(email_name_maps.delete().where(email_name_maps.c.id.in_(duplicate_ids)))
+
+    for (user_id, name_key), row_id in keep.items():
+        bind.execute(
+            email_name_maps.update()
+            .where(email_name_maps.c.id == row_id)
+            .values(name_key=name_key)
+        )
+
+    indexes = {index["name"] for index in inspector.get_indexes("email_name_maps")}
+    if INDEX_NAME not in indexes:
+        op.create_index(INDEX_NAME, "email_name_maps", ["user_id", "name_key"], unique=True)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name="email_name_maps")
+    op.drop_column("email_name_maps", "name_key")
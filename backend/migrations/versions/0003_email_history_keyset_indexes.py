@@ -0,0 +1,36 @@
+"""Add keyset pagination indexes to email_histories
+
+The history endpoints page on (created_at, id), newest first, for one user
+or for everyone. These indexes let each page be a single range scan.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_email_histories_user_id_created_at_id": ["user_id", "created_at", "id"],
+    "ix_email_histories_created_at_id": ["created_at", "id"],
+}
+
+
+def upgrade():
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("email_histories")}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "email_histories", columns)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name="email_histories")
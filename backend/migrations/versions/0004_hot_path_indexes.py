@@ -0,0 +1,63 @@
+"""Index the hot query paths on oauth_tokens and email_histories
+
+Every Gmail call loads the token by (user_id, service), which had no index
+and no uniqueness, so duplicate rows were possible. Duplicates are removed
+(keeping the most recently updated) before the unique index is created.
+email_histories gets a (status, created_at) index for status filters and
+for draining queued batch sends.
+
+Per-user history and contact lookups are already covered by the
+(user_id, created_at, id) and (user_id, name_key) indexes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+OAUTH_INDEX = "ix_oauth_tokens_user_id_service"
+STATUS_INDEX = "ix_email_histories_status_created_at"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    oauth_tokens = sa.table(
+        "oauth_tokens",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("service", sa.String),
+        sa.column("updated_at", sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(oauth_tokens.c.id, oauth_tokens.c.user_id, oauth_tokens.c.service)
+        .order_by(oauth_tokens.c.updated_at, oauth_tokens.c.id)
+    ).all()
+    latest = {}
+    for row in rows:
+        latest[(row.user_id, row.service)] = row.id
+    kept_ids = set(latest.values())
+    duplicate_ids = [row.id for row in rows if row.id not in kept_ids]
+    if duplicate_ids:
+        bind.execute(oauth_tokens.delete().where(oauth_tokens.c.id.in_(duplicate_ids)))
+
+    if OAUTH_INDEX not in {index["name"] for index in inspector.get_indexes("oauth_tokens")}:
+        op.create_index(OAUTH_INDEX, "oauth_tokens", ["user_id", "service"], unique=True)
+
+    if STATUS_INDEX not in {index["name"] for index in inspector.get_indexes("email_histories")}:
+        op.create_index(STATUS_INDEX, "email_histories", ["status", "created_at"])
+
+
+def downgrade():
+    op.drop_index(STATUS_INDEX, table_name="email_histories")
+    op.drop_index(OAUTH_INDEX, table_name="oauth_tokens")
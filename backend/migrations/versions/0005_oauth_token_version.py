@@ -0,0 +1,31 @@
+"""Add a version column to oauth_tokens for optimistic updates
+
+The credential cache only writes a refreshed token back if the row's
+version is unchanged, so concurrent refreshes from several workers do not
+overwrite each other.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("oauth_tokens")}
+    if "version" not in columns:
+        op.add_column("oauth_tokens", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    with op.batch_alter_table("oauth_tokens") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,46 @@
+"""Add gmail_messages, a local cache of fetched Gmail messages
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "gmail_messages" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "gmail_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("message_id", sa.String(), nullable=False),
+        sa.Column("thread_id", sa.String()),
+        sa.Column("subject", sa.String()),
+        sa.Column("from_address", sa.String()),
+        sa.Column("date", sa.String()),
+        sa.Column("snippet", sa.String()),
+        sa.Column("body", sa.Text()),
+        sa.Column("body_size", sa.Integer()),
+        sa.Column("label_ids", sa.JSON()),
+        sa.Column("internal_date", sa.BigInteger()),
+        sa.Column("fetched_at", sa.DateTime()),
+        sa.Column("last_accessed_at", sa.DateTime()),
+    )
+    op.create_index("ix_gmail_messages_id", "gmail_messages", ["id"])
+    op.create_index("ix_gmail_messages_user_id_message_id", "gmail_messages", ["user_id", "message_id"], unique=True)
+    op.create_index("ix_gmail_messages_user_id_last_accessed_at", "gmail_messages", ["user_id", "last_accessed_at"])
+
+
+def downgrade():
+    op.drop_table("gmail_messages")
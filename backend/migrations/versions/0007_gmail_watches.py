@@ -0,0 +1,40 @@
+"""Add gmail_watches, the Gmail push notification registrations
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "gmail_watches" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "gmail_watches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("email_address", sa.String(), nullable=False),
+        sa.Column("topic_name", sa.String(), nullable=False),
+        sa.Column("history_id", sa.String()),
+        sa.Column("expiration", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_gmail_watches_id", "gmail_watches", ["id"])
+    op.create_index("ix_gmail_watches_user_id", "gmail_watches", ["user_id"], unique=True)
+    op.create_index("ix_gmail_watches_email_address", "gmail_watches", ["email_address"])
+
+
+def downgrade():
+    op.drop_table("gmail_watches")
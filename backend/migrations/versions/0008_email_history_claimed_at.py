@@ -0,0 +1,31 @@
+"""Add claimed_at to email_histories for the queued-email drain
+
+Queued emails are claimed (status "sending", claimed_at set) in one atomic
+UPDATE before they are handed to Resend, so two workers never send the same
+row, and a claim left behind by a crashed worker can be found by its age.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("email_histories")}
+    if "claimed_at" not in columns:
+        op.add_column("email_histories", sa.Column("claimed_at", sa.DateTime()))
+
+
+def downgrade():
+    with op.batch_alter_table("email_histories") as batch_op:
+        batch_op.drop_column("claimed_at")
@@ -0,0 +1,109 @@
+"""
+Shared test setup.
+
+The app runs against a throwaway SQLite database that is migrated to head
+once per session. The environment is set before any app module is imported,
+because app.common.database builds its engine at import time.
+"""
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="tasks_web_app_tests_")
+os.environ.pop("RENDER", None)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["RUN_MIGRATIONS"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("RESEND_API_KEY", "re_test")
+os.environ["EMAIL_QUEUE_DRAIN_ENABLED"] = "false"
+os.environ["GMAIL_PUBSUB_TOPIC"] = "projects/test/topics/gmail"
+os.environ["GMAIL_PUSH_TOKEN"] = "push-token"
+
+import pytest
+
+from app.common.database import SessionLocal, engine
+from app.common.migrate import upgrade_database
+from app.common.models import Base, User
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    upgrade_database()
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="user@example.com", hashed_password="x", name="Test User", is_active=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def client(user):
+    """API client authenticated as `user`; startup workers are not started"""
+    from fastapi.testclient import TestClient
+
+    from app.common.auth import get_current_user
+    from app.core.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database while the test runs"""
+    from sqlalchemy import event
+
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def gmail(user, monkeypatch):
+    """A fake Gmail mailbox that GmailClient.authenticate connects `user` to"""
+    from app.tools.read_gmail_tool.gmail_client import GmailClient
+    from app.tools.read_gmail_tool.sync_engine import gmail_sync_engine
+    from tests.fake_gmail import FakeGmailService
+
+    service = FakeGmailService()
+
+    def authenticate(self, user_id, db=None):
+        self.user_id = user_id
+        self.service = service
+        return service
+
+    monkeypatch.setattr(GmailClient, "authenticate", authenticate)
+    gmail_sync_engine.reset(user.id)
+    yield service
+    gmail_sync_engine.reset(user.id)
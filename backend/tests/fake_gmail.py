@@ -0,0 +1,152 @@
+"""
+In-memory stand-in for the googleapiclient Gmail service.
+
+Supports the calls GmailClient makes: messages().list/get, batch requests,
+getProfile, history().list, watch and stop. Messages are built with
+make_message(); inbox changes made with add()/archive() are recorded as
+history records the way Gmail reports them.
+"""
+import base64
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def http_error(status: int, reason: str = "error") -> HttpError:
+    return HttpError(httplib2.Response({"status": status, "reason": reason}), reason.encode("utf-8"))
+
+
+def make_message(message_id, subject="Subject", body="Body", internal_date=1000, label_ids=("INBOX",)):
+    return {
+        "id": message_id,
+        "threadId": f"t{message_id}",
+        "snippet": body[:20],
+        "internalDate": str(internal_date),
+        "labelIds": list(label_ids),
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [
+                {"name": "Subject", "value": subject},
+                {"name": "From", "value": "sender@example.com"},
+                {"name": "Date", "value": "Mon, 1 Jan 2024 10:00:00 +0000"},
+            ],
+            "parts": [{
+                "mimeType": "text/plain",
+                "headers": [{"name": "Content-Type", "value": "text/plain; charset=utf-8"}],
+                "body": {"data": b64(body.encode("utf-8"))},
+            }],
+        },
+    }
+
+
+class _Request:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self):
+        return self.fn()
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        self.service.calls["batch"] += 1
+        for request, request_id in self.requests:
+            try:
+                response = request.execute()
+            except HttpError as error:
+                self.callback(request_id, None, error)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeGmailService:
+    def __init__(self, messages=(), email_address="user@gmail.com", failing=()):
+        self.mailbox = {message["id"]: message for message in messages}
+        self.inbox = [message["id"] for message in messages if "INBOX" in message["labelIds"]]
+        self.email_address = email_address
+        self.failing = set(failing)
+        self.history_id = 100
+        self.history_records = []
+        self.calls = {"list": 0, "get": 0, "batch": 0, "history": 0, "profile": 0, "watch": 0}
+        # format= of every messages().get, in order
+        self.formats = []
+
+    # users() / messages() / history() return the service itself
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def history(self):
+        return _History(self)
+
+    def new_batch_http_request(self, callback):
+        return _Batch(self, callback)
+
+    def list(self, userId, maxResults=10, labelIds=None, **kwargs):
+        self.calls["list"] += 1
+        ordered = sorted(self.inbox, key=lambda message_id: -int(self.mailbox[message_id]["internalDate"]))
+        return _Request(lambda: {"messages": [{"id": message_id} for message_id in ordered[:maxResults]]})
+
+    def get(self, userId, id, format="full", **kwargs):
+        def fetch():
+            self.calls["get"] += 1
+            self.formats.append(format)
+            if id in self.failing or id not in self.mailbox:
+                raise http_error(404, "Not Found")
+            return self.mailbox[id]
+        return _Request(fetch)
+
+    def getProfile(self, userId):
+        self.calls["profile"] += 1
+        return _Request(lambda: {"emailAddress": self.email_address, "historyId": str(self.history_id)})
+
+    def watch(self, userId, body):
+        self.calls["watch"] += 1
+        return _Request(lambda: {"historyId": str(self.history_id), "expiration": "4102444800000"})
+
+    def stop(self, userId):
+        return _Request(lambda: {})
+
+    # Mailbox changes, recorded as Gmail history
+    def add(self, message):
+        self.history_id += 1
+        self.mailbox[message["id"]] = message
+        self.inbox.append(message["id"])
+        self.history_records.append((self.history_id, {
+            "messagesAdded": [{"message": {"id": message["id"], "labelIds": message["labelIds"]}}]
+        }))
+
+    def archive(self, message_id):
+        self.history_id += 1
+        self.inbox.remove(message_id)
+        self.history_records.append((self.history_id, {
+            "labelsRemoved": [{"message": {"id": message_id}, "labelIds": ["INBOX"]}]
+        }))
+
+
+class _History:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId, startHistoryId, **kwargs):
+        service = self.service
+        service.calls["history"] += 1
+        start = int(startHistoryId)
+        return _Request(lambda: {
+            "history": [record for history_id, record in service.history_records if history_id > start],
+            "historyId": str(service.history_id),
+        })
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import ai_client as ai_client_module
+from app.core.ai_client import ai_client
+from app.core.completion_cache import CompletionCache
+
+
+def _request(content):
+    return {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": content}], "temperature": 0.7}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CompletionCache(maxsize=16)
+    monkeypatch.setattr(ai_client_module, "completion_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    calls = []
+
+    def create_completion(label, request):
+        calls.append(request)
+        message = SimpleNamespace(content=f"Draft {len(calls)}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=SimpleNamespace(total_tokens=50))
+
+    monkeypatch.setattr(ai_client, "_create_completion", create_completion)
+    return calls
+
+
+def test_key_ignores_whitespace_but_not_case():
+    cache = CompletionCache()
+    key = cache.make_key(_request("Ask Bob  about\nthe meeting"))
+
+    assert cache.make_key(_request(" Ask Bob about the meeting ")) == key
+    assert cache.make_key(_request("ask bob about the meeting")) != key
+
+
+def test_generated_content_is_reused(cache, completions):
+    first = ai_client.generate_email_content("Ask Bob about the meeting", "friendly")
+    second = ai_client.generate_email_content("Ask Bob about the meeting", "friendly")
+
+    assert first == second == "Draft 1"
+    assert len(completions) == 1
+    assert cache.stats()["tokens_saved"] == 50
+
+
+def test_send_email_tool_regenerates_without_cache(cache, completions):
+    ai_client.generate_email_content("Ask Bob about the meeting", "friendly")
+
+    result = ai_client.send_email_tool("bob@example.com", "Meeting", "Ask Bob about the meeting",
+                                       "friendly", use_cache=False)
+
+    assert result["email_composition"]["body"] == "Draft 2"
+    assert len(completions) == 2
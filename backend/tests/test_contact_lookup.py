@@ -0,0 +1,51 @@
+import pytest
+
+from app.common.models import EmailNameMap
+from app.tools.add_contact_mapping_tool.mapping_functions import add_name_email_mapping
+from app.tools.lookup_contact_tool.contact_index import contact_index
+from app.tools.lookup_contact_tool.lookup_functions import resolve_contact
+
+
+@pytest.fixture
+def contacts(user, db):
+    contact_index.invalidate(user.id)
+    add_name_email_mapping("John Smith", "john@example.com", user.id, db)
+    add_name_email_mapping("Joanna Miller", "joanna@example.com", user.id, db)
+    yield
+    contact_index.invalidate(user.id)
+
+
+def test_whole_word_match_resolves(user, db, contacts):
+    match, candidates = resolve_contact("smith", user.id, db)
+
+    assert match["email_address"] == "john@example.com"
+
+
+@pytest.mark.parametrize("name", ["j", "jo", "smi", "jonh"])
+def test_short_prefix_and_misspelled_names_are_only_suggested(user, db, contacts, name):
+    match, candidates = resolve_contact(name, user.id, db)
+
+    assert match is None
+    assert candidates
+
+
+def test_mapping_changed_by_another_worker_is_not_used(user, db, contacts):
+    resolve_contact("smith", user.id, db)
+    mapping = db.query(EmailNameMap).filter(EmailNameMap.name == "John Smith").one()
+    mapping.email_address = "john.smith@example.com"
+    db.commit()
+
+    match, candidates = resolve_contact("smith", user.id, db)
+
+    assert match["email_address"] == "john.smith@example.com"
+
+
+def test_mapping_deleted_by_another_worker_is_not_resolved(user, db, contacts):
+    resolve_contact("smith", user.id, db)
+    db.query(EmailNameMap).filter(EmailNameMap.name == "John Smith").delete()
+    db.commit()
+
+    match, candidates = resolve_contact("smith", user.id, db)
+
+    assert match is None
+    assert "john@example.com" not in [candidate["email_address"] for candidate in candidates]
@@ -0,0 +1,70 @@
+from app.core.ai_client import ai_client
+from app.core.context_manager import ConversationContextManager
+
+
+def _conversation(turns):
+    messages = [{"role": "user", "content": "Send an email to Alice, subject is Budget and content is the review on Friday"}]
+    for turn in range(turns):
+        messages.append({"role": "assistant", "content": f"Reply {turn} " + "filler " * 40})
+        messages.append({"role": "user", "content": f"Question {turn} " + "filler " * 40})
+    return messages
+
+
+def test_composition_request_survives_compaction():
+    manager = ConversationContextManager(max_prompt_tokens=300, recent_messages=4)
+    messages = _conversation(10)
+
+    compacted, stats = manager.compact(messages)
+
+    assert stats["sent_messages"] < stats["original_messages"]
+    assert compacted[0]["role"] == "system"
+    assert compacted[1] == messages[0]
+    assert compacted[-1] == messages[-1]
+    assert ai_client._lookup_composition_request(compacted, [
+        {"tool_name": "lookup_email_by_name", "result": {"success": True, "email_address": "alice@example.com"}}
+    ]) == {
+        "lookup_result": {"success": True, "email_address": "alice@example.com"},
+        "subject": "budget",
+        "content": "the review on friday",
+        "body": None
+    }
+
+
+def test_short_conversation_is_unchanged():
+    manager = ConversationContextManager()
+    messages = _conversation(2)
+
+    compacted, stats = manager.compact(messages)
+
+    assert compacted == messages
+    assert stats["sent_tokens"] == stats["original_tokens"]
+
+
+def test_missing_encoding_falls_back_to_approximate_counts(tmp_path, monkeypatch):
+    import tiktoken
+
+    def download(name):
+        raise AssertionError("the encoding must not be downloaded")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", download)
+    manager = ConversationContextManager(encoding_dir=str(tmp_path))
+    assert manager.stats()["tokenizer"] == "not loaded"
+
+    assert manager.count_tokens("x" * 40) == 10
+    assert manager.stats()["tokenizer"] == "approximate"
+
+
+def test_corrupt_encoding_is_not_refetched(tmp_path, monkeypatch):
+    import tiktoken
+
+    from app.core import context_manager as context_manager_module
+
+    def download(name):
+        raise AssertionError("the encoding must not be downloaded")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", download)
+    with open(context_manager_module._encoding_path(str(tmp_path)), "wb") as f:
+        f.write(b"truncated")
+    manager = ConversationContextManager(encoding_dir=str(tmp_path))
+
+    assert manager.count_tokens("x" * 40) == 10
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.common.models import EmailHistory, User
+
+
+@pytest.fixture
+def admin(db, user):
+    user.is_admin = True
+    db.commit()
+    return user
+
+
+def _add_history(db, count):
+    # A sender per row, so a per-row user lookup would show up as extra statements
+    senders = [User(email=f"sender{index}@example.com", hashed_password="x", name=f"Sender {index}")
+               for index in range(count)]
+    db.add_all(senders)
+    db.flush()
+    started = datetime.utcnow()
+    db.add_all(EmailHistory(
+        user_id=senders[index].id,
+        recipient=f"to{index}@example.com",
+        subject=f"Subject {index}",
+        content_preview="preview",
+        full_content_html="<p>body</p>",
+        status="sent",
+        created_at=started - timedelta(minutes=index)
+    ) for index in range(count))
+    db.commit()
+
+
+def _statements_for_page(client, db, statements, count):
+    _add_history(db, count)
+    del statements[:]
+
+    response = client.get("/email-tools/admin/history", params={"limit": 100})
+
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) == count
+    assert all(row["user_email"].startswith("sender") for row in rows)
+    return list(statements)
+
+
+def test_admin_history_query_count_does_not_grow_with_rows(client, db, admin, statements):
+    small = _statements_for_page(client, db, statements, 5)
+    db.query(EmailHistory).delete()
+    db.query(User).filter(User.email.like("sender%")).delete(synchronize_session=False)
+    db.commit()
+    large = _statements_for_page(client, db, statements, 50)
+
+    assert len(small) == len(large)
+    # One joined query for the page; no per-row user lookups
+    assert len([statement for statement in large if "email_histories" in statement]) == 1
+
+
+def test_admin_history_streams_json(client, db, admin):
+    _add_history(db, 5)
+
+    response = client.get("/email-tools/admin/history", params={"stream": "true"})
+
+    assert response.headers["content-type"].startswith("application/json")
+    assert [row["recipient"] for row in response.json()] == [f"to{index}@example.com" for index in range(5)]
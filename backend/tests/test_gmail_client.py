@@ -0,0 +1,36 @@
+from app.tools.read_gmail_tool.gmail_client import GmailClient
+from tests.fake_gmail import FakeGmailService, make_message
+
+
+def _client(service):
+    client = GmailClient()
+    client.service = service
+    return client
+
+
+def test_batch_fetch_keeps_other_messages_when_one_fails():
+    service = FakeGmailService(
+        [make_message("m1", "First"), make_message("m2", "Second"), make_message("m3", "Third")],
+        failing={"m2"}
+    )
+    client = _client(service)
+
+    emails = client.get_full_messages(["m1", "m2", "m3"])
+
+    assert [email["id"] for email in emails] == ["m1", "m3"]
+    assert [email["subject"] for email in emails] == ["First", "Third"]
+    assert list(client.last_fetch_errors) == ["m2"]
+    assert "404" in client.last_fetch_errors["m2"]
+    assert service.calls["batch"] == 1
+
+
+def test_batch_fetch_splits_into_chunks():
+    ids = [f"m{i}" for i in range(GmailClient.BATCH_SIZE + 5)]
+    service = FakeGmailService([make_message(message_id) for message_id in ids])
+    client = _client(service)
+
+    emails = client.get_full_messages(ids)
+
+    assert len(emails) == len(ids)
+    assert service.calls["batch"] == 2
+    assert client.last_fetch_errors == {}
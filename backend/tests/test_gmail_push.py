@@ -0,0 +1,94 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.main import app
+from app.tools.read_gmail_tool.gmail_client import GmailClient
+from app.tools.read_gmail_tool.local_pubsub import LocalPubSubPublisher
+from app.tools.read_gmail_tool.prefetcher import inbox_prefetcher
+from app.tools.read_gmail_tool.push import gmail_push
+from app.tools.read_gmail_tool.sync_engine import gmail_sync_engine
+from tests.fake_gmail import make_message
+
+PUSH_URL = "/email-tools/gmail/push"
+
+
+@pytest.fixture
+def watched(db, user, gmail, monkeypatch):
+    """A mirrored inbox with a stored watch, as a freshly restarted worker sees it"""
+    monkeypatch.setattr(GmailClient, "has_stored_credentials", lambda self, user_id, db: True)
+    gmail.add(make_message("m1", "First", internal_date=1000))
+    gmail_client = GmailClient()
+    gmail_client.authenticate(user.id)
+    gmail_sync_engine.get_inbox(gmail_client, user.id, 10)
+    gmail_push.register_watch(gmail_client, user.id, db)
+
+    # A restart keeps only what is in the database
+    gmail_push.forget(user.id)
+    assert not gmail_push.is_watched(user.id)
+    yield gmail
+    gmail_push.forget(user.id)
+
+
+@pytest.fixture
+def api(watched):
+    # Entering the client runs the startup hooks, which load the stored watches
+    with TestClient(app) as client:
+        yield client
+
+
+def _publisher(api, token="push-token"):
+    return LocalPubSubPublisher(PUSH_URL, token=token, client=api)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_bad_token_is_rejected(api, watched):
+    notifications = gmail_push.stats()["notifications"]
+
+    response = _publisher(api, token="wrong").publish(watched.email_address, watched.history_id + 1)
+
+    assert response.status_code == 403
+    assert gmail_push.stats()["notifications"] == notifications
+
+
+def test_watches_are_restored_on_startup(api, user):
+    assert gmail_push.is_watched(user.id)
+
+
+def test_old_history_id_is_already_applied(api, watched):
+    response = _publisher(api).publish(watched.email_address, watched.history_id)
+
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "message": "Inbox already up to date"}
+
+
+def test_new_history_id_schedules_a_sync(api, watched, user):
+    watched.add(make_message("m2", "Second", internal_date=2000))
+
+    response = _publisher(api).publish(watched.email_address.upper(), watched.history_id)
+
+    assert response.json() == {"success": True, "message": "Inbox sync scheduled"}
+    _wait_for(lambda: gmail_sync_engine.synced_history_id(user.id) == watched.history_id)
+    emails, _ = gmail_sync_engine.peek_inbox(user.id, 2)
+    assert [email["subject"] for email in emails] == ["Second", "First"]
+
+
+def test_unknown_mailbox_is_acknowledged(api):
+    response = _publisher(api).publish("someone-else@gmail.com", 500)
+
+    assert response.json() == {"success": False, "message": "No Gmail watch for this mailbox"}
+
+
+def test_watched_inbox_is_still_bounded_by_max_stale(api, user, monkeypatch):
+    assert inbox_prefetcher.cached_inbox(user.id, 1) is not None
+
+    monkeypatch.setattr(inbox_prefetcher, "max_stale", 0)
+
+    assert inbox_prefetcher.cached_inbox(user.id, 1) is None
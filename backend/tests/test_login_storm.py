@@ -0,0 +1,80 @@
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+from passlib.context import CryptContext
+
+from app.common import auth
+from app.common import executor as executor_module
+from app.common.executor import BlockingExecutor
+from app.common.user_cache import user_cache
+
+LOGINS = 32
+
+
+@pytest.fixture
+def bcrypt_threads(monkeypatch):
+    """Names of the threads each password check ran on, on a fresh executor"""
+    monkeypatch.setattr(executor_module, "blocking_executor", BlockingExecutor(
+        max_workers=8, upstream_limits={"bcrypt": 4}, default_limit=4, dedicated_upstreams=["bcrypt"]))
+    # A low cost keeps the storm quick; the hash still goes through bcrypt
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=6)
+    monkeypatch.setattr(auth, "pwd_context", pwd_context)
+    threads = []
+    verify_and_update = pwd_context.verify_and_update
+
+    def recording_verify(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return verify_and_update(*args, **kwargs)
+
+    monkeypatch.setattr(pwd_context, "verify_and_update", recording_verify)
+    return threads
+
+
+async def _login_storm(app):
+    """Fire LOGINS concurrent logins; return their latencies and the longest event loop stall"""
+    stalls = []
+
+    async def ticker():
+        while True:
+            tick = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append(time.perf_counter() - tick - 0.01)
+
+    async def login(http):
+        started_at = time.perf_counter()
+        response = await http.post("/auth/login", data={"username": "user@example.com", "password": "secret"})
+        assert response.status_code == 200
+        return time.perf_counter() - started_at
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        ticking = asyncio.create_task(ticker())
+        latencies = await asyncio.gather(*(login(http) for _ in range(LOGINS)))
+        ticking.cancel()
+    return sorted(latencies), max(stalls, default=0.0)
+
+
+def test_login_storm_hashes_on_the_bcrypt_pool(user, db, bcrypt_threads):
+    from app.core.main import app
+
+    user.hashed_password = auth.get_password_hash("secret")
+    db.merge(user)
+    db.commit()
+    user_cache.invalidate(user.email)
+
+    latencies, longest_stall = asyncio.run(_login_storm(app))
+
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"\n{LOGINS} concurrent logins: p50 {p50 * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms, "
+          f"longest event loop stall {longest_stall * 1000:.0f} ms")
+
+    assert len(bcrypt_threads) == LOGINS
+    assert all(name.startswith("bcrypt-pool") for name in bcrypt_threads)
+    bcrypt_stats = executor_module.blocking_executor.stats()["upstreams"]["bcrypt"]
+    assert bcrypt_stats["completed"] == LOGINS
+    assert bcrypt_stats["max_queued"] > 0
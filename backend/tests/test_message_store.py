@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Session
+
+from app.tools.read_gmail_tool.message_store import gmail_message_store
+
+
+def _email(message_id, body):
+    return {"id": message_id, "threadId": "t1", "subject": "Subject", "from": "a@example.com",
+            "date": "Mon, 1 Jan 2024 10:00:00 +0000", "snippet": "snippet", "body": body,
+            "labelIds": ["INBOX"], "internalDate": 1000}
+
+
+def _fail_next_commit(monkeypatch):
+    commit = Session.commit
+    failures = []
+
+    def failing_commit(session):
+        if not failures:
+            failures.append(True)
+            raise RuntimeError("database unavailable")
+        return commit(session)
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+
+
+def test_save_body_updates_a_stored_message(user):
+    gmail_message_store.save_messages(user.id, [_email("m1", None)])
+
+    gmail_message_store.save_body(user.id, "m1", "Hello")
+
+    stored = gmail_message_store.get_message(user.id, "m1")
+    assert stored["body"] == "Hello"
+    assert stored["subject"] == "Subject"
+
+
+def test_failed_body_update_reports_not_stored(user, monkeypatch):
+    gmail_message_store.save_messages(user.id, [_email("m1", None)])
+    _fail_next_commit(monkeypatch)
+
+    assert gmail_message_store._update_body(user.id, "m1", "Hello") is False
+    assert gmail_message_store.get_message(user.id, "m1") is None
+
+
+def test_save_body_falls_back_to_insert_when_the_update_fails(user, monkeypatch):
+    gmail_message_store.save_messages(user.id, [_email("m1", None)])
+    _fail_next_commit(monkeypatch)
+
+    gmail_message_store.save_body(user.id, "m1", "Hello")
+
+    assert gmail_message_store.get_message(user.id, "m1")["body"] == "Hello"
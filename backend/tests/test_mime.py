@@ -0,0 +1,81 @@
+from app.tools.read_gmail_tool.mime import NO_CONTENT, extract_body
+from tests.fake_gmail import b64
+
+
+def _part(mime_type, data: bytes, charset="utf-8", **extra):
+    part = {
+        "mimeType": mime_type,
+        "headers": [{"name": "Content-Type", "value": f"{mime_type}; charset={charset}"}],
+        "body": {"data": b64(data), "size": len(data)},
+    }
+    part.update(extra)
+    return part
+
+
+def _multipart(mime_type, *parts):
+    return {"mimeType": mime_type, "headers": [], "body": {"size": 0}, "parts": list(parts)}
+
+
+def test_nested_multipart_skips_the_attachment():
+    attachment = _part("text/plain", b"attachment text", filename="notes.txt")
+    attachment["headers"].append({"name": "Content-Disposition", "value": 'attachment; filename="notes.txt"'})
+    payload = _multipart(
+        "multipart/mixed",
+        attachment,
+        _multipart(
+            "multipart/related",
+            _multipart(
+                "multipart/alternative",
+                _part("text/plain", b"Plain body"),
+                _part("text/html", b"<p>HTML body</p>"),
+            ),
+            _part("image/png", b"\x89PNG", filename="logo.png"),
+        ),
+    )
+
+    assert extract_body(payload) == "Plain body"
+
+
+def test_html_only_message_is_converted_to_text():
+    html = (b"<html><head><style>p { color: red }</style><title>Ignored</title></head><body>"
+            b"<p>Hello&nbsp;<b>there</b></p><p>Line one<br>Line two</p>"
+            b"<table><tr><td>a</td><td>b</td></tr></table>"
+            b"<script>alert('x')</script></body></html>")
+    payload = _multipart("multipart/alternative", _part("text/html", html))
+
+    assert extract_body(payload) == "Hello there\n\nLine one\nLine two\n\na b"
+
+
+def test_non_utf8_charset_is_decoded():
+    payload = _part("text/plain", "Grüße aus Köln".encode("iso-8859-1"), charset='"ISO-8859-1"')
+
+    assert extract_body(payload) == "Grüße aus Köln"
+
+
+def test_unknown_charset_falls_back_to_utf8():
+    payload = _part("text/plain", "naïve".encode("utf-8"), charset="x-unknown")
+
+    assert extract_body(payload) == "naïve"
+
+
+def test_oversized_body_is_truncated_at_the_cap():
+    body = ("é" * 50 + "x") * 1000
+    payload = _part("text/plain", body.encode("utf-8"))
+
+    text = extract_body(payload, max_bytes=1000)
+
+    # 1000 bytes end inside a two-byte character, which is dropped
+    assert text == body.encode("utf-8")[:999].decode("utf-8")
+    assert "�" not in text
+
+
+def test_single_part_without_mime_type_is_plain_text():
+    payload = {"headers": [], "body": {"data": b64(b"Just text"), "size": 9}}
+
+    assert extract_body(payload) == "Just text"
+
+
+def test_message_without_text_parts_has_no_content():
+    payload = _multipart("multipart/mixed", _part("application/pdf", b"%PDF", filename="a.pdf"))
+
+    assert extract_body(payload) == NO_CONTENT
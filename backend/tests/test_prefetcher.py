@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+from app.tools.read_gmail_tool.prefetcher import InboxPrefetcher
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_forced_revalidate_during_a_sync_queues_a_follow_up():
+    prefetcher = InboxPrefetcher()
+    release = threading.Event()
+    syncs = []
+
+    def sync_inbox(user_id):
+        syncs.append(user_id)
+        if len(syncs) == 1:
+            release.wait(5)
+        return True
+
+    prefetcher._sync_inbox = sync_inbox
+
+    async def scenario():
+        assert prefetcher.revalidate(1, force=True) is True
+        await _wait_for(lambda: syncs)
+
+        # A notification arriving mid-sync is not dropped
+        assert prefetcher.revalidate(1, force=True) is False
+        assert prefetcher.revalidate(1, force=True) is False
+        release.set()
+        await _wait_for(lambda: len(syncs) == 2 and not prefetcher._tasks)
+
+    asyncio.run(scenario())
+
+    assert syncs == [1, 1]
+    assert prefetcher.stats()["followup_syncs"] == 1
+    assert prefetcher.stats()["in_flight"] == 0
+
+
+def test_unforced_revalidate_during_a_sync_is_dropped():
+    prefetcher = InboxPrefetcher()
+    release = threading.Event()
+    syncs = []
+
+    def sync_inbox(user_id):
+        syncs.append(user_id)
+        release.wait(5)
+        return True
+
+    prefetcher._sync_inbox = sync_inbox
+
+    async def scenario():
+        assert prefetcher.revalidate(1) is True
+        await _wait_for(lambda: syncs)
+        assert prefetcher.revalidate(1) is False
+        release.set()
+        await _wait_for(lambda: not prefetcher._tasks)
+
+    asyncio.run(scenario())
+
+    assert syncs == [1]
+    assert prefetcher.stats()["followup_syncs"] == 0
@@ -0,0 +1,54 @@
+from app.tools.read_gmail_tool.gmail_client import GmailClient
+from app.tools.read_gmail_tool.sync_engine import gmail_sync_engine
+from tests.fake_gmail import make_message
+
+
+def _fill(gmail, count):
+    for index in range(count):
+        gmail.add(make_message(f"m{index}", f"Subject {index}", internal_date=1000 + index))
+
+
+def _gmail_client(user):
+    gmail_client = GmailClient()
+    gmail_client.authenticate(user.id)
+    return gmail_client
+
+
+def _read_inbox(client, max_results):
+    response = client.post("/email-tools/read-inbox", params={"max_results": max_results})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_read_inbox_lists_metadata_without_a_full_sync(client, gmail, user):
+    _fill(gmail, 3)
+
+    body = _read_inbox(client, 10)
+
+    assert [email["subject"] for email in body["gmail_emails"]] == ["Subject 2", "Subject 1", "Subject 0"]
+    assert set(gmail.formats) == {"metadata"}
+    assert gmail_sync_engine.peek_inbox(user.id, 3) is None
+
+
+def test_read_inbox_uses_a_mirrored_inbox_incrementally(client, gmail, user):
+    _fill(gmail, 3)
+    gmail_sync_engine.get_inbox(_gmail_client(user), user.id, 10)
+    gmail.formats.clear()
+    gmail.add(make_message("new", "Newest", internal_date=5000))
+
+    body = _read_inbox(client, 10)
+
+    assert body["gmail_emails"][0]["subject"] == "Newest"
+    assert len(body["gmail_emails"]) == 4
+    # Only the added message is downloaded
+    assert gmail.formats == ["full"]
+
+
+def test_read_inbox_beyond_the_mirror_window_is_not_clamped(client, gmail, user):
+    _fill(gmail, gmail_sync_engine.max_window + 20)
+
+    body = _read_inbox(client, gmail_sync_engine.max_window + 10)
+
+    assert len(body["gmail_emails"]) == gmail_sync_engine.max_window + 10
+    assert set(gmail.formats) == {"metadata"}
+
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.common.database import engine
+from app.common.models import EmailHistory
+from app.tools.send_email_tool.email_client import email_client
+from app.tools.send_email_tool.outbox import email_outbox
+
+
+@pytest.fixture
+def resend(monkeypatch):
+    """Fake Resend batch send that fails every recipient at fail.example.com"""
+    batches = []
+
+    def send_batch(emails):
+        batches.append([email["to_email"] for email in emails])
+        return [
+            {"success": False, "message": "Failed to send email: rejected"}
+            if email["to_email"].endswith("@fail.example.com")
+            else {"success": True, "message": "Email sent successfully", "email_id": f"re_{email['to_email']}"}
+            for email in emails
+        ]
+
+    monkeypatch.setattr(email_client, "send_batch", send_batch)
+    return batches
+
+
+@pytest.fixture
+def inserts():
+    """
+    (table, row count) of every INSERT executed. This counts statements as
+    SQLAlchemy executes them: PostgreSQL sends a multi-row INSERT as one
+    INSERT ... VALUES statement, while SQLite, which cannot order RETURNING
+    rows, runs it one cursor row at a time.
+    """
+    executed = []
+
+    def before_execute(conn, clauseelement, multiparams, params, execution_options):
+        if getattr(clauseelement, "is_insert", False):
+            executed.append((clauseelement.table.name, len(multiparams) or 1))
+
+    event.listen(engine, "before_execute", before_execute)
+    yield executed
+    event.remove(engine, "before_execute", before_execute)
+
+
+def _batch(recipients, background=False):
+    return {
+        "emails": [{"recipient": recipient, "subject": "Hello", "body": "Hi there",
+                    "composition_id": f"c{index}"} for index, recipient in enumerate(recipients)],
+        "background": background
+    }
+
+
+def _history(db):
+    return {row.recipient: row for row in db.query(EmailHistory).order_by(EmailHistory.id)}
+
+
+def test_batch_records_sent_emails_with_one_insert(client, db, resend, inserts):
+    recipients = ["a@example.com", "b@fail.example.com", "c@example.com"]
+
+    response = client.post("/email-tools/approve-and-send/batch", json=_batch(recipients))
+
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["sent", "failed", "sent"]
+    assert body["success"] is False
+    assert resend == [recipients]
+    assert inserts == [("email_histories", 2)]
+
+    history = _history(db)
+    assert set(history) == {"a@example.com", "c@example.com"}
+    assert history["a@example.com"].email_id == "re_a@example.com"
+    assert body["results"][0]["email_id"] == history["a@example.com"].id
+
+
+def test_queued_batch_records_status_per_email(client, db, resend, inserts):
+    recipients = ["a@example.com", "b@fail.example.com", "c@example.com"]
+
+    response = client.post("/email-tools/approve-and-send/batch", json=_batch(recipients, background=True))
+
+    body = response.json()
+    assert body["queued"] is True
+    assert [result["status"] for result in body["results"]] == ["queued"] * 3
+    assert inserts == [("email_histories", 3)]
+
+    # TestClient runs the background drain before returning
+    history = _history(db)
+    assert {recipient: row.status for recipient, row in history.items()} == {
+        "a@example.com": "sent", "b@fail.example.com": "failed", "c@example.com": "sent"
+    }
+    assert history["c@example.com"].email_id == "re_c@example.com"
+    assert history["b@fail.example.com"].email_id is None
+    assert resend == [recipients]
+
+
+def test_drain_skips_claimed_rows_and_fails_stale_claims(db, user, resend):
+    now = datetime.utcnow()
+    db.add_all([
+        EmailHistory(user_id=user.id, recipient="queued@example.com", subject="s", full_content_html="x", status="queued"),
+        EmailHistory(user_id=user.id, recipient="sending@example.com", subject="s", full_content_html="x",
+                     status="sending", claimed_at=now),
+        EmailHistory(user_id=user.id, recipient="stale@example.com", subject="s", full_content_html="x",
+                     status="sending", claimed_at=now - timedelta(seconds=email_outbox.sending_timeout + 1)),
+    ])
+    db.commit()
+
+    assert asyncio.run(email_outbox.drain()) == 1
+    assert asyncio.run(email_outbox.drain()) == 0
+
+    db.expire_all()
+    assert {recipient: row.status for recipient, row in _history(db).items()} == {
+        "queued@example.com": "sent", "sending@example.com": "sending", "stale@example.com": "failed"
+    }
+    assert resend == [["queued@example.com"]]
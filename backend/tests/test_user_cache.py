@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.common.auth import create_access_token, get_current_user
+from app.common.database import SessionLocal
+from app.common.models import User
+from app.common.user_cache import user_cache
+
+
+def _current_user(db, email):
+    return asyncio.run(get_current_user(create_access_token({"sub": email}), db))
+
+
+def _deactivate_elsewhere(user_id):
+    """Deactivate through another session without invalidating, as another worker would"""
+    other = SessionLocal()
+    try:
+        other.query(User).filter(User.id == user_id).update({"is_active": False})
+        other.commit()
+    finally:
+        other.close()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(user):
+    user_cache.invalidate(user.email)
+    yield
+    user_cache.invalidate(user.email)
+
+
+def test_cached_user_flags_are_rechecked(db, user, monkeypatch):
+    assert _current_user(db, user.email).is_active
+
+    _deactivate_elsewhere(user.id)
+    # Within the recheck interval the cached flags are served
+    assert _current_user(db, user.email).is_active
+
+    monkeypatch.setattr(user_cache, "recheck_interval", 0)
+    # The next request runs in a fresh session
+    db.expunge_all()
+    assert not _current_user(db, user.email).is_active
+
+
+def test_unchanged_user_is_only_rechecked(db, user, monkeypatch):
+    _current_user(db, user.email)
+    monkeypatch.setattr(user_cache, "recheck_interval", 0)
+    rechecks = user_cache.stats()["rechecks"]
+
+    assert _current_user(db, user.email).id == user.id
+    assert user_cache.stats()["rechecks"] == rechecks + 1
+    assert user_cache.get(user.email) is not None
@@ -6,15 +6,17 @@ const AdminEmailHistory = () => {
   const [emails, setEmails] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
 
   useEffect(() => {
     fetchEmailHistory();
   }, []);
 
-  const fetchEmailHistory = async () => {
+  const fetchEmailHistory = async (cursor = null) => {
     try {
-      const response = await getAdminEmailHistory();
-      setEmails(response.data);
+      const response = await getAdminEmailHistory(cursor);
+      setEmails((previous) => (cursor ? [...previous, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching email history:', error);
       setError('Failed to fetch email history. You may not have admin privileges.');
@@ -62,6 +64,11 @@ const AdminEmailHistory = () => {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <button className="load-more" onClick={() => fetchEmailHistory(nextCursor)}>
+              Load more
+            </button>
+          )}
         </div>
       )}
     </div>
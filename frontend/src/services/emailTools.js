@@ -34,9 +34,10 @@ export const getAvailableTools = async () => {
   }
 };
 
-export const getEmailHistory = async () => {
+export const getEmailHistory = async (cursor = null) => {
   try {
-    const response = await api.get('/email-tools/history');
+    // Pages are newest first; the next page's cursor comes back in X-Next-Cursor
+    const response = await api.get('/email-tools/history', { params: cursor ? { cursor } : {} });
     return response;
   } catch (error) {
     if (error.response?.status === 401) {
@@ -46,9 +47,10 @@ export const getEmailHistory = async () => {
   }
 };
 
-export const getAdminEmailHistory = async () => {
+export const getAdminEmailHistory = async (cursor = null) => {
   try {
-    const response = await api.get('/email-tools/admin/history');
+    // Pages are newest first; the next page's cursor comes back in X-Next-Cursor
+    const response = await api.get('/email-tools/admin/history', { params: cursor ? { cursor } : {} });
     return response;
   } catch (error) {
     if (error.response?.status === 401) {